@@ -0,0 +1,435 @@
+# Benchmark harness for okr-server.py.
+#
+# Starts a local stand-in for the OKR REST API, starts okr-server.py against it
+# (streamable HTTP transport), drives the MCP tools through real MCP client
+# sessions at a fixed concurrency and reports throughput, latency percentiles,
+# server memory/CPU and the number of upstream requests per route.
+#
+#   python okr-bench.py --workload mixed --concurrency 20 --duration 30
+#   python okr-bench.py --latency 50 --error-rate 0.02 --json > run.json
+#
+# Extra server settings (OKR_CACHE_*, OKR_LIMIT_*, ...) are passed through from
+# the environment, so a change can be compared by running the same command twice.
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "okr-server.py")
+
+
+def build_dataset(config):
+    """Deterministic reference and transactional data sized by the command line."""
+    rng = random.Random(config.seed)
+    pad = "x" * config.pad_bytes
+    employees = config.employees
+    departments = {i: {"id": i, "name": f"Department {i}"} for i in range(1, 6)}
+    roles = {i: {"id": i, "name": name} for i, name in enumerate(["admin", "manager", "employee"], 1)}
+    leave_types = {i: {"id": i, "name": name, "max_days_per_year": days}
+                   for i, (name, days) in enumerate([("annual", 20), ("sick", 10), ("unpaid", 30)], 1)}
+    data = {
+        "departments": departments,
+        "roles": roles,
+        "leave_types": leave_types,
+        "employees": {
+            i: {
+                "id": i,
+                "name": f"{rng.choice(['Ada', 'Alan', 'Grace', 'Linus', 'Barbara', 'Dennis'])} Employee{i}",
+                "email": f"employee{i}@example.com",
+                "role_id": rng.randint(1, len(roles)),
+                "department_id": rng.randint(1, len(departments)),
+                "joined_date": f"202{rng.randint(0, 5)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            }
+            for i in range(1, employees + 1)
+        },
+        "time_sheets": {
+            i: {
+                "id": i,
+                "employee_id": rng.randint(1, employees),
+                "work_date": f"2026-0{rng.randint(1, 9)}-{rng.randint(10, 28)}",
+                "hours_worked": rng.randint(1, 9),
+                "discription": f"work {i} {pad}",
+            }
+            for i in range(1, config.records + 1)
+        },
+        "leaves": {
+            i: {
+                "id": i,
+                "employee_id": rng.randint(1, employees),
+                "leave_date": f"2026-0{rng.randint(1, 9)}-{rng.randint(10, 28)}",
+                "leave_type_id": rng.randint(1, len(leave_types)),
+                "reason": f"leave {i} {pad}",
+                "status": rng.choice(["pending", "approved", "rejected"]),
+            }
+            for i in range(1, config.records + 1)
+        },
+        "objectives": {
+            i: {
+                "id": i,
+                "title": f"Objective {i}",
+                "description": pad,
+                "employee_id": i,
+                "start_date": "2026-01-01",
+                "end_date": "2026-12-31",
+            }
+            for i in range(1, employees + 1)
+        },
+        "projects": {
+            i: {
+                "id": i,
+                "name": f"Project {name}",
+                "description": pad,
+                "department_id": rng.randint(1, len(departments)),
+                "start_date": "2026-01-01",
+                "end_date": "2026-12-31",
+                "status": "active",
+            }
+            for i, name in enumerate(["Apollo", "Gemini", "Mercury", "Artemis", "Voyager",
+                                      "Pioneer", "Viking", "Juno", "Cassini", "Hubble"], 1)
+        },
+    }
+    data["key_results"] = {
+        i: {
+            "id": i,
+            "objective_id": rng.randint(1, employees),
+            "title": f"Key result {i}",
+            "target_value": 100,
+            "current_value": rng.randint(0, 100),
+            "progress": 0,
+        }
+        for i in range(1, 3 * employees + 1)
+    }
+    data["project_allocations"] = {
+        i: {
+            "id": i,
+            "project_id": rng.randint(1, len(data["projects"])),
+            "employee_id": i,
+            "role_in_project": "developer",
+            "status": "active",
+        }
+        for i in range(1, employees + 1)
+    }
+    return data
+
+
+def mock_app(config):
+    """Starlette app answering the OKR REST routes used by okr-server.py."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    data = build_dataset(config)
+    counts = Counter()
+    rng = random.Random(config.seed)
+    next_id = [10 ** 6]
+
+    def route_of(method, parts):
+        return f"{method} /" + "/".join("{id}" if part.isdigit() else part for part in parts)
+
+    async def bench_counts(request):
+        if request.method == "DELETE":
+            counts.clear()
+        return JSONResponse(dict(counts))
+
+    async def handler(request):
+        parts = [part for part in request.url.path.split("/") if part]
+        counts[route_of(request.method, parts)] += 1
+        if config.latency or config.jitter:
+            await asyncio.sleep((config.latency + rng.uniform(0, config.jitter)) / 1000)
+        if parts and parts[0] != "login" and rng.random() < config.error_rate:
+            return Response("injected failure", status_code=503)
+        if parts == ["login"]:
+            body = await request.json()
+            return JSONResponse({"access_token": f"bench-{body.get('email')}", "user_id": 1, "role_id": 1})
+        table = data.get(parts[0]) if parts else None
+        if table is None:
+            return Response("Not found", status_code=404)
+        if len(parts) == 1:
+            if request.method == "GET":
+                return JSONResponse(list(table.values()))
+            next_id[0] += 1
+            record = {"id": next_id[0], **(await request.json())}
+            table[record["id"]] = record
+            return JSONResponse(record, status_code=201)
+        if parts[0] == "project_allocations" and len(parts) == 3:
+            key, value = f"{parts[1]}_id", int(parts[2])
+            return JSONResponse([record for record in table.values() if record.get(key) == value])
+        if parts[0] == "project_allocations":
+            return JSONResponse([record for record in table.values() if record.get("status") == parts[1]])
+        record_id = int(parts[1])
+        if parts[0] in ("leaves", "time_sheets") and request.method in ("GET", "POST"):
+            return JSONResponse([record for record in table.values() if record["employee_id"] == record_id])
+        if record_id not in table:
+            return Response("Not found", status_code=404)
+        if request.method == "DELETE":
+            del table[record_id]
+            return JSONResponse({"deleted": record_id})
+        if request.method == "PUT":
+            table[record_id].update(await request.json())
+        return JSONResponse(table[record_id])
+
+    return Starlette(routes=[
+        Route("/_bench/counts", bench_counts, methods=["GET", "DELETE"]),
+        Route("/{path:path}", handler, methods=["GET", "POST", "PUT", "DELETE"]),
+    ])
+
+
+def run_mock(config):
+    import uvicorn
+
+    uvicorn.run(mock_app(config), host="127.0.0.1", port=config.mock_port, log_level="warning")
+
+
+def employee(rng, config):
+    return rng.randint(1, config.employees)
+
+
+# (weight, tool, arguments) per workload; arguments are drawn per call
+WORKLOADS = {
+    "read": [
+        (4, "get_specific_employee_details", lambda rng, c: {"employee_id": employee(rng, c)}),
+        (3, "get_a_specific_user_timesheet", lambda rng, c: {"employee_id": employee(rng, c)}),
+        (3, "get_a_specific_user_leave", lambda rng, c: {"employee_id": employee(rng, c)}),
+        (2, "get_a_specific_project_details", lambda rng, c: {"project_id": rng.randint(1, 10)}),
+        (2, "search_employees", lambda rng, c: {"query": rng.choice(["ada", "grace", "employee1", "linus"])}),
+    ],
+    "list": [
+        (3, "list_timesheets", lambda rng, c: {"employee_id": employee(rng, c), "limit": 50}),
+        (3, "list_leaves", lambda rng, c: {"status": "approved", "limit": 50}),
+        (2, "list_objectives", lambda rng, c: {"department_id": rng.randint(1, 5), "limit": 50}),
+        (2, "list_project_allocations", lambda rng, c: {"project_id": rng.randint(1, 10)}),
+    ],
+    "report": [
+        (2, "report_hours", lambda rng, c: {"group_by": rng.choice(["department", "employee"])}),
+        (2, "report_leave_balances", lambda rng, c: {"department_id": rng.randint(1, 5)}),
+        (2, "report_okr_progress", lambda rng, c: {"group_by": "department"}),
+        (1, "get_employee_360", lambda rng, c: {"employee_id": employee(rng, c)}),
+        (1, "get_project_dashboard", lambda rng, c: {"project_id": rng.randint(1, 10)}),
+    ],
+    "write": [
+        (3, "create_time_sheet", lambda rng, c: {
+            "employee_id": employee(rng, c), "work_date": "2026-10-01", "hours_worked": 8, "discription": "bench"}),
+        (2, "update_key_result", lambda rng, c: {
+            "key_result_id": rng.randint(1, 3 * c.employees), "title": "bench", "target_value": 100,
+            "current_value": rng.randint(0, 100), "progress": 0}),
+        (1, "update_leave", lambda rng, c: {
+            "leave_id": rng.randint(1, c.records), "status": "approved", "approved_by": 1}),
+    ],
+}
+WORKLOADS["mixed"] = WORKLOADS["read"] + WORKLOADS["list"] + WORKLOADS["report"] + WORKLOADS["write"][:1]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(samples):
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 2) if ordered else None,
+        **{f"p{int(q * 100)}_ms": round(1000 * percentile(ordered, q), 2) if ordered else None
+           for q in (0.5, 0.95, 0.99)},
+        "max_ms": round(1000 * ordered[-1], 2) if ordered else None,
+    }
+
+
+def process_stats(pid):
+    """Resident memory and CPU seconds of a local process, read from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "rss_mb": round(int(status["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mb": round(int(status["VmHWM"].split()[0]) / 1024, 1),
+        "cpu_seconds": round((int(fields[11]) + int(fields[12])) / ticks, 2),
+    }
+
+
+async def wait_for(url, timeout):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def drive(config, url, until, latencies, errors):
+    """Run config.concurrency MCP sessions calling tools from the workload until `until()` is true."""
+    mix = WORKLOADS[config.workload]
+    weights = [weight for weight, _, _ in mix]
+
+    async def session_loop(index):
+        rng = random.Random(config.seed + index)
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                if config.login:
+                    await session.call_tool("okr_login", {"email": config.login, "password": "bench"})
+                while not until():
+                    _, tool, arguments = rng.choices(mix, weights)[0]
+                    started = time.perf_counter()
+                    try:
+                        result = await session.call_tool(tool, arguments(rng, config))
+                        failed = result.isError
+                    except Exception:
+                        failed = True
+                    latencies[tool].append(time.perf_counter() - started)
+                    if failed:
+                        errors[tool] += 1
+
+    await asyncio.gather(*(session_loop(i) for i in range(config.concurrency)))
+
+
+async def benchmark(config):
+    mock_url = f"http://127.0.0.1:{config.mock_port}"
+    server_url = config.server_url or f"http://127.0.0.1:{config.server_port}"
+    server = None
+    mock = multiprocessing.Process(target=run_mock, args=(config,), daemon=True)
+    mock.start()
+    try:
+        await wait_for(f"{mock_url}/_bench/counts", 10)
+        if not config.server_url:
+            env = {**os.environ, "OKR_URL": mock_url}
+            server = subprocess.Popen(
+                [sys.executable, SERVER_SCRIPT, "--transport", "streamable-http",
+                 "--host", "127.0.0.1", "--port", str(config.server_port)],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=None if config.verbose else subprocess.DEVNULL,
+            )
+            await wait_for(f"{server_url}/readyz", 30)
+        mcp_url = f"{server_url}/mcp"
+
+        if config.warmup:
+            warmup_end = time.monotonic() + config.warmup
+            await drive(config, mcp_url, lambda: time.monotonic() >= warmup_end, defaultdict(list), Counter())
+
+        async with httpx.AsyncClient() as client:
+            await client.delete(f"{mock_url}/_bench/counts")
+            before = process_stats(server.pid) if server else None
+            latencies, errors = defaultdict(list), Counter()
+            started = time.perf_counter()
+            if config.requests:
+                until = lambda: sum(map(len, latencies.values())) >= config.requests
+            else:
+                deadline = time.monotonic() + config.duration
+                until = lambda: time.monotonic() >= deadline
+            await drive(config, mcp_url, until, latencies, errors)
+            elapsed = time.perf_counter() - started
+            after = process_stats(server.pid) if server else None
+            upstream = (await client.get(f"{mock_url}/_bench/counts")).json()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(10)
+        mock.terminate()
+
+    calls = sum(map(len, latencies.values()))
+    upstream_total = sum(upstream.values())
+    report = {
+        "workload": config.workload,
+        "concurrency": config.concurrency,
+        "mock": {"latency_ms": config.latency, "jitter_ms": config.jitter, "error_rate": config.error_rate,
+                 "employees": config.employees, "records": config.records, "pad_bytes": config.pad_bytes},
+        "elapsed_seconds": round(elapsed, 2),
+        "calls": calls,
+        "errors": sum(errors.values()),
+        "throughput_per_second": round(calls / elapsed, 1) if elapsed else None,
+        "latency": latency_summary([sample for samples in latencies.values() for sample in samples]),
+        "tools": {
+            tool: {**latency_summary(samples), "errors": errors[tool]}
+            for tool, samples in sorted(latencies.items())
+        },
+        "upstream": {
+            "requests": upstream_total,
+            "per_call": round(upstream_total / calls, 2) if calls else None,
+            "routes": dict(sorted(upstream.items(), key=lambda item: -item[1])),
+        },
+        "server": None,
+    }
+    if before and after:
+        report["server"] = {
+            "rss_mb": after["rss_mb"],
+            "peak_rss_mb": after["peak_rss_mb"],
+            "rss_growth_mb": round(after["rss_mb"] - before["rss_mb"], 1),
+            "cpu_seconds": round(after["cpu_seconds"] - before["cpu_seconds"], 2),
+        }
+    return report
+
+
+def print_report(report):
+    latency = report["latency"]
+    print(f"workload {report['workload']}, concurrency {report['concurrency']}, "
+          f"{report['calls']} calls in {report['elapsed_seconds']}s, {report['errors']} errors")
+    print(f"throughput {report['throughput_per_second']}/s, latency p50 {latency['p50_ms']}ms "
+          f"p95 {latency['p95_ms']}ms p99 {latency['p99_ms']}ms max {latency['max_ms']}ms")
+    if report["server"]:
+        server = report["server"]
+        print(f"server rss {server['rss_mb']}MB (peak {server['peak_rss_mb']}MB, "
+              f"+{server['rss_growth_mb']}MB), cpu {server['cpu_seconds']}s")
+    print()
+    print(f"{'tool':<34}{'calls':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for tool, stats in report["tools"].items():
+        print(f"{tool:<34}{stats['count']:>8}{stats['errors']:>8}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    upstream = report["upstream"]
+    print()
+    print(f"upstream requests {upstream['requests']} ({upstream['per_call']} per call)")
+    for route, count in upstream["routes"].items():
+        print(f"  {route:<40}{count:>8}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark okr-server.py against a local mock OKR backend")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent MCP client sessions")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of measured load")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many calls instead of --duration")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load first")
+    parser.add_argument("--latency", type=float, default=20, help="mock response latency in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="extra uniform random latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock responses that are 503")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--records", type=int, default=5000, help="time sheets and leaves in the mock")
+    parser.add_argument("--pad-bytes", type=int, default=0, help="padding added to each record's text field")
+    parser.add_argument("--login", help="log every session in as this email before the run")
+    parser.add_argument("--mock-port", type=int, default=18900)
+    parser.add_argument("--server-port", type=int, default=18901)
+    parser.add_argument("--server-url", help="benchmark an already running server instead of starting one "
+                                             "(it must use http://127.0.0.1:<mock-port> as OKR_URL)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the server's log output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = asyncio.run(benchmark(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
@@ -1,896 +1,4319 @@
+import time
+
+# measured from here so --startup-benchmark can report how long imports and setup take
+IMPORT_STARTED = time.perf_counter()
+
 from mcp.server.fastmcp import FastMCP
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager, aclosing
+from bisect import bisect_left, insort
+from functools import lru_cache
+import base64
+import codecs
+import hashlib
+import hmac
+import logging
+import json
+import asyncio
+import contextvars
+import random
+import re
+import secrets
+import weakref
+import zlib
 import httpx
+import pydantic_core
+from pydantic import AnyUrl
 from dotenv import load_dotenv
 import os
+from mcp.server.fastmcp.exceptions import ResourceError
+from mcp.server.fastmcp.resources import FunctionResource
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import TextContent
+try:
+    import orjson  # optional: faster JSON encoding and decoding
+except ImportError:
+    orjson = None
 load_dotenv()
 
-mcp = FastMCP(
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing a value is a bisect and two additions."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that contains it."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Per-call and per-upstream-route latency, size and error statistics."""
+
+    def __init__(self):
+        self.call_seconds = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.call_upstream_seconds = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.call_local_seconds = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.call_errors = defaultdict(int)
+        self.upstream_seconds = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.upstream_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.upstream_responses = defaultdict(int)
+        self.started_at = time.time()
+
+    def observe_call(self, kind: str, name: str, seconds: float, upstream_seconds: float, failed: bool):
+        key = (kind, name)
+        self.call_seconds[key].observe(seconds)
+        self.call_upstream_seconds[key].observe(upstream_seconds)
+        self.call_local_seconds[key].observe(max(seconds - upstream_seconds, 0.0))
+        if failed:
+            self.call_errors[key] += 1
+
+    def observe_upstream(self, method: str, route: str, status: str, seconds: float, size: int):
+        key = (method, route)
+        self.upstream_seconds[key].observe(seconds)
+        self.upstream_bytes[key].observe(size)
+        self.upstream_responses[(method, route, status)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        uptime = max(time.time() - self.started_at, 1e-9)
+        calls = {}
+        for (kind, name), histogram in self.call_seconds.items():
+            calls[f"{kind}:{name}"] = {
+                "calls_per_second": histogram.count / uptime,
+                "errors": self.call_errors[(kind, name)],
+                "latency": histogram.summary(),
+                "upstream": self.call_upstream_seconds[(kind, name)].summary(),
+                "local": self.call_local_seconds[(kind, name)].summary(),
+            }
+        upstream = {}
+        for (method, route), histogram in self.upstream_seconds.items():
+            payload = self.upstream_bytes[(method, route)]
+            upstream[f"{method} {route}"] = {
+                "requests_per_second": histogram.count / uptime,
+                "latency": histogram.summary(),
+                "bytes_total": payload.sum,
+                "bytes_p95": payload.quantile(0.95),
+                "status": {
+                    status: count
+                    for (m, r, status), count in self.upstream_responses.items()
+                    if (m, r) == (method, route)
+                },
+            }
+        return {"uptime_seconds": uptime, "calls": calls, "upstream": upstream}
+
+    def prometheus(self) -> str:
+        lines = []
+
+        def histogram_lines(metric, help_text, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in series:
+                label_text = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels)
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{label_text}}} {histogram.sum}")
+                lines.append(f"{metric}_count{{{label_text}}} {histogram.count}")
+
+        def counter_lines(metric, help_text, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                label_text = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels)
+                lines.append(f"{metric}{{{label_text}}} {value}")
+
+        def call_series(histograms):
+            return [((("kind", kind), ("name", name)), h) for (kind, name), h in histograms.items()]
+
+        def route_series(histograms):
+            return [((("method", method), ("route", route)), h) for (method, route), h in histograms.items()]
+
+        histogram_lines("okr_mcp_call_duration_seconds", "Total time spent handling an MCP tool call or resource read.", call_series(self.call_seconds))
+        histogram_lines("okr_mcp_call_upstream_seconds", "Time a call spent waiting on the OKR server.", call_series(self.call_upstream_seconds))
+        histogram_lines("okr_mcp_call_local_seconds", "Time a call spent in this server outside upstream requests.", call_series(self.call_local_seconds))
+        counter_lines("okr_mcp_call_errors_total", "MCP tool calls and resource reads that failed.", [((("kind", kind), ("name", name)), v) for (kind, name), v in self.call_errors.items()])
+        histogram_lines("okr_upstream_request_duration_seconds", "Latency of requests to the OKR server.", route_series(self.upstream_seconds))
+        histogram_lines("okr_upstream_response_bytes", "Size of OKR server response bodies as received.", route_series(self.upstream_bytes))
+        counter_lines("okr_upstream_responses_total", "OKR server responses by status code.", [((("method", m), ("route", r), ("status", status)), v) for (m, r, status), v in self.upstream_responses.items()])
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value) -> str:
+    """Escape a Prometheus label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+# Upstream seconds accumulated by the tool call or resource read currently running
+_call_upstream_seconds = contextvars.ContextVar("call_upstream_seconds", default=None)
+
+
+def _json_default(value):
+    try:
+        return pydantic_core.to_jsonable_python(value)
+    except Exception:
+        return str(value)
+
+
+def json_dumps(value) -> str:
+    """Compact JSON text, through orjson when it is installed."""
+    if orjson is not None:
+        # int keys (e.g. totals per id) are written as strings, as json.dumps does
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compact_content(result) -> List[TextContent]:
+    """Tool result as MCP text content: same blocks as FastMCP produces (one per
+    list item), but with each block encoded as compact JSON instead of indented."""
+    if result is None:
+        return []
+    if isinstance(result, (list, tuple)):
+        return [block for item in result for block in compact_content(item)]
+    if isinstance(result, TextContent):
+        return [result]
+    return [TextContent(type="text", text=result if isinstance(result, str) else json_dumps(result))]
+
+
+class InstrumentedFastMCP(FastMCP):
+    """FastMCP that records latency and errors for every tool call and resource read."""
+
+    async def call_tool(self, name, arguments):
+        # names come from the client, so unknown ones share one series instead of adding one each
+        metric_name = name if self._tool_manager.get_tool(name) is not None else "<unknown>"
+        return await self._measure("tool", metric_name, self._call_tool(name, arguments))
+
+    async def read_resource(self, uri):
+        return await self._measure("resource", self._resource_metric_name(str(uri)), self._read_resource(uri))
+
+    def _resource_metric_name(self, uri: str) -> str:
+        """Template URI for a templated resource, so per-record URIs share one series."""
+        if uri in self._resource_manager._resources:
+            return uri
+        for template in self._resource_manager._templates.values():
+            if template.matches(uri) is not None:
+                return template.uri_template
+        return "<unknown>"
+
+    async def _call_tool(self, name, arguments):
+        tool = self._tool_manager.get_tool(name)
+        if not OKR_COMPACT_JSON or tool is None or tool.output_schema is not None:
+            return await super().call_tool(name, arguments)
+        result = await tool.run(arguments, context=self.get_context())
+        if not isinstance(result, (dict, list, tuple, str, int, float, bool, TextContent, type(None))):
+            return tool.fn_metadata.convert_result(result)
+        return compact_content(result)
+
+    async def _read_resource(self, uri):
+        resource = await self._resource_manager.get_resource(uri, context=self.get_context())
+        if not OKR_COMPACT_JSON or not isinstance(resource, FunctionResource):
+            return await super().read_resource(uri)
+        try:
+            result = resource.fn()
+            if asyncio.iscoroutine(result):
+                result = await result
+            content = result if isinstance(result, (str, bytes)) else json_dumps(result)
+        except Exception as e:
+            logger.exception("Error reading resource %s", uri)
+            raise ResourceError(f"Error reading resource {uri}: {e}")
+        return [ReadResourceContents(content=content, mime_type=resource.mime_type, meta=resource.meta)]
+
+    async def _measure(self, kind: str, name: str, call):
+        upstream = [0.0]
+        token = _call_upstream_seconds.set(upstream)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await call
+            failed = False
+            return result
+        finally:
+            _call_upstream_seconds.reset(token)
+            metrics.observe_call(kind, name, time.perf_counter() - started, upstream[0], failed)
+
+
+mcp = InstrumentedFastMCP(
     name="QH-OKR-MCP-Server-standalone",
-    host="0.0.0.0",
-    port=9001
+    host=os.getenv("OKR_MCP_HOST", "0.0.0.0"),
+    port=int(os.getenv("OKR_MCP_PORT", "9001")),
+    # stateless streamable-HTTP gives every request a fresh session: okr_login identities and
+    # resources/subscribe do not carry over (not needed for --workers, which routes sessions)
+    stateless_http=os.getenv("OKR_MCP_STATELESS", "false").lower() in ("1", "true", "yes"),
 )
 OKR_SERVER_URL = os.getenv("OKR_URL")
 
+# Upstream connection pool settings
+OKR_HTTP_MAX_CONNECTIONS = int(os.getenv("OKR_HTTP_MAX_CONNECTIONS", "100"))
+OKR_HTTP_MAX_KEEPALIVE = int(os.getenv("OKR_HTTP_MAX_KEEPALIVE", "20"))
+OKR_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OKR_HTTP_KEEPALIVE_EXPIRY", "30"))
+OKR_HTTP_TIMEOUT = float(os.getenv("OKR_HTTP_TIMEOUT", "5"))
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+OKR_HTTP2 = os.getenv("OKR_HTTP2", "false").lower() in ("1", "true", "yes")
+# Upstream responses are requested with Accept-Encoding gzip/deflate; httpx adds br and zstd
+# when the optional brotli and zstandard packages are installed (pip install "httpx[brotli,zstd]")
+
+# Downstream gzip for HTTP responses and SSE streams, and compact JSON for tool and resource results
+OKR_GZIP = os.getenv("OKR_GZIP", "true").lower() in ("1", "true", "yes")
+OKR_GZIP_LEVEL = int(os.getenv("OKR_GZIP_LEVEL", "6"))
+OKR_GZIP_MIN_SIZE = int(os.getenv("OKR_GZIP_MIN_SIZE", "1024"))
+OKR_COMPACT_JSON = os.getenv("OKR_COMPACT_JSON", "true").lower() in ("1", "true", "yes")
+
+# Reference list cache: TTL in seconds per resource (0 disables), total size bound in bytes
+OKR_CACHE_MAX_BYTES = int(os.getenv("OKR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Conditional GETs: validators and parsed bodies of recent reference and detail reads,
+# bound in bytes of estimated parsed size (about 3x the raw JSON)
+OKR_CONDITIONAL_MAX_BYTES = int(os.getenv("OKR_CONDITIONAL_MAX_BYTES", str(16 * 1024 * 1024)))
+OKR_CACHE_TTLS = {
+    "employees": float(os.getenv("OKR_CACHE_TTL_EMPLOYEES", "60")),
+    "roles": float(os.getenv("OKR_CACHE_TTL_ROLES", "300")),
+    "departments": float(os.getenv("OKR_CACHE_TTL_DEPARTMENTS", "300")),
+    "leave_types": float(os.getenv("OKR_CACHE_TTL_LEAVE_TYPES", "300")),
+    "projects": float(os.getenv("OKR_CACHE_TTL_PROJECTS", "60")),
+}
+
+# Maximum number of upstream requests in flight for a single batch tool call
+OKR_BATCH_CONCURRENCY = int(os.getenv("OKR_BATCH_CONCURRENCY", "10"))
+
+# Upstream concurrency limits, shared by all sessions
+OKR_LIMIT_GLOBAL = int(os.getenv("OKR_LIMIT_GLOBAL", "64"))
+OKR_LIMIT_PER_ROUTE = int(os.getenv("OKR_LIMIT_PER_ROUTE", "16"))
+OKR_LIMIT_MIN = int(os.getenv("OKR_LIMIT_MIN", "2"))
+OKR_LIMIT_QUEUE_TIMEOUT = float(os.getenv("OKR_LIMIT_QUEUE_TIMEOUT", "10"))
+# Adaptive mode shrinks limits when upstream slows down or returns 429/5xx and grows them back when healthy
+OKR_LIMIT_ADAPTIVE = os.getenv("OKR_LIMIT_ADAPTIVE", "true").lower() in ("1", "true", "yes")
+OKR_LIMIT_TARGET_LATENCY = float(os.getenv("OKR_LIMIT_TARGET_LATENCY", "1.0"))
+
+# Retries for idempotent upstream calls (GET/PUT/DELETE)
+OKR_RETRY_MAX_ATTEMPTS = int(os.getenv("OKR_RETRY_MAX_ATTEMPTS", "3"))
+OKR_RETRY_BASE_DELAY = float(os.getenv("OKR_RETRY_BASE_DELAY", "0.1"))
+OKR_RETRY_MAX_DELAY = float(os.getenv("OKR_RETRY_MAX_DELAY", "2.0"))
+# Retries may add at most this fraction of extra requests, plus a small per-second allowance
+OKR_RETRY_BUDGET_RATIO = float(os.getenv("OKR_RETRY_BUDGET_RATIO", "0.2"))
+OKR_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("OKR_RETRY_BUDGET_MIN_PER_SECOND", "10"))
+# Circuit breaker per upstream route
+OKR_BREAKER_FAILURE_THRESHOLD = int(os.getenv("OKR_BREAKER_FAILURE_THRESHOLD", "5"))
+OKR_BREAKER_RESET_TIMEOUT = float(os.getenv("OKR_BREAKER_RESET_TIMEOUT", "30"))
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Page size bounds for the paginated list tools
+OKR_PAGE_DEFAULT_LIMIT = int(os.getenv("OKR_PAGE_DEFAULT_LIMIT", "50"))
+OKR_PAGE_MAX_LIMIT = int(os.getenv("OKR_PAGE_MAX_LIMIT", "500"))
+
+# Parse list responses incrementally as they arrive instead of buffering the whole body
+OKR_STREAMING = os.getenv("OKR_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# Session tokens from okr_login are cached per email and sent as Bearer auth on later calls
+OKR_TOKEN_CACHE_SIZE = int(os.getenv("OKR_TOKEN_CACHE_SIZE", "1024"))
+# Lifetime assumed when the token is not a JWT and the login response has no expires_in
+OKR_TOKEN_TTL = float(os.getenv("OKR_TOKEN_TTL", "3600"))
+OKR_TOKEN_REFRESH_MARGIN = float(os.getenv("OKR_TOKEN_REFRESH_MARGIN", "60"))
+# Optional identity used for calls from sessions that have not logged in
+OKR_SERVICE_EMAIL = os.getenv("OKR_SERVICE_EMAIL")
+OKR_SERVICE_PASSWORD = os.getenv("OKR_SERVICE_PASSWORD")
+
+# Optional in-memory mirror of the reference lists, synced in the background and after local writes
+OKR_MIRROR_ENABLED = os.getenv("OKR_MIRROR_ENABLED", "false").lower() in ("1", "true", "yes")
+OKR_MIRROR_SYNC_INTERVAL = float(os.getenv("OKR_MIRROR_SYNC_INTERVAL", "60"))
+# Without the mirror: indexed tables of the cached lists, one per (identity, collection), least recently used dropped
+OKR_LOOKUP_TABLES_MAX = int(os.getenv("OKR_LOOKUP_TABLES_MAX", "256"))
+
+# Readiness: reference lists warmed at startup and the upstream probe run by app_lifespan
+OKR_WARMUP_KEYS = [key for key in os.getenv("OKR_WARMUP_KEYS", "roles,departments,leave_types").split(",") if key]
+OKR_PROBE_PATH = os.getenv("OKR_PROBE_PATH", "/roles/")
+OKR_PROBE_INTERVAL = float(os.getenv("OKR_PROBE_INTERVAL", "15"))
+OKR_PROBE_FAILURE_THRESHOLD = int(os.getenv("OKR_PROBE_FAILURE_THRESHOLD", "3"))
+
+# Resource subscriptions: seconds between polls of the subscribed list resources
+OKR_SUBSCRIPTION_POLL_INTERVAL = float(os.getenv("OKR_SUBSCRIPTION_POLL_INTERVAL", "10"))
+
+# Optional write-behind for create_time_sheet and update_key_result: writes are acknowledged once
+# stored in a local SQLite queue and sent upstream in batches by a background flusher
+OKR_WRITE_BEHIND = os.getenv("OKR_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+# The queue lives in a state directory outside the source tree so it never ends up in a build context
+OKR_WRITE_BEHIND_PATH = os.getenv("OKR_WRITE_BEHIND_PATH") or os.path.join(
+    os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "okr-server", "write-behind.sqlite3"
+)
+OKR_WRITE_BEHIND_INTERVAL = float(os.getenv("OKR_WRITE_BEHIND_INTERVAL", "1"))
+OKR_WRITE_BEHIND_BATCH = int(os.getenv("OKR_WRITE_BEHIND_BATCH", "100"))
+OKR_WRITE_BEHIND_CONCURRENCY = int(os.getenv("OKR_WRITE_BEHIND_CONCURRENCY", "10"))
+OKR_WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("OKR_WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+# Seconds a worker's claim on queued writes lasts before another worker may take them over
+OKR_WRITE_BEHIND_LEASE = float(os.getenv("OKR_WRITE_BEHIND_LEASE", "120"))
+
+# OKR progress engine: seconds before the in-memory index is rebuilt from the OKR server
+OKR_PROGRESS_REFRESH_INTERVAL = float(os.getenv("OKR_PROGRESS_REFRESH_INTERVAL", "300"))
+
+# Seconds from import to ready-to-serve that --startup-benchmark treats as acceptable
+OKR_STARTUP_BUDGET = float(os.getenv("OKR_STARTUP_BUDGET", "1.0"))
+
+logger = logging.getLogger("okr-server")
+
+_http_client = None
+# Path segments this server sends literally; every other segment is a parameter
+_ROUTE_SEGMENTS = frozenset((
+    "login", "employees", "departments", "roles", "leave_types", "leaves", "projects",
+    "project_allocations", "project", "employee", "time_sheets", "objectives", "key_results",
+))
+
+
+def upstream_route(request: httpx.Request) -> str:
+    """Route template of a request path, so metrics, limiters and breakers are kept per route,
+    not per record: numeric ids become {id} and any other unknown segment (e.g. an allocation
+    status) becomes {value}, so client-supplied values cannot add series.
+    """
+    return "/".join(
+        segment if not segment or segment in _ROUTE_SEGMENTS else "{id}" if segment.isdigit() else "{value}"
+        for segment in request.url.path.split("/")
+    )
+
+
+class MeteredStream(httpx.AsyncByteStream):
+    """Response body wrapper that counts bytes and reports once the body is closed."""
+
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._size = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close(self._size)
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that records latency, size and status of every upstream request."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        method = request.method
+        route = upstream_route(request)
+        upstream = _call_upstream_seconds.get()
+        started = time.perf_counter()
+
+        def finish(status: str, size: int):
+            elapsed = time.perf_counter() - started
+            metrics.observe_upstream(method, route, status, elapsed, size)
+            if upstream is not None:
+                upstream[0] += elapsed
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            finish(type(e).__name__, 0)
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=MeteredStream(response.stream, lambda size: finish(str(response.status_code), size)),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class AdaptiveLimiter:
+    """Concurrency limit whose size can change while callers are queued.
+    In adaptive mode the limit follows AIMD: it is cut by a quarter (at most
+    once per target-latency window) when a response is slow, a 429/5xx or a
+    timeout, and grows by 1/limit on every healthy response up to max_limit.
+    """
+
+    def __init__(self, max_limit: int, adaptive: bool):
+        self.max_limit = max_limit
+        self.min_limit = min(OKR_LIMIT_MIN, max_limit)
+        self.adaptive = adaptive
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self, timeout: float):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as we gave up
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass  # a release already popped it after it was cancelled
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def record(self, latency: float, overloaded: bool):
+        if not self.adaptive:
+            return
+        if overloaded or latency > OKR_LIMIT_TARGET_LATENCY:
+            now = time.monotonic()
+            if now - self._last_decrease >= OKR_LIMIT_TARGET_LATENCY:
+                self.limit = max(float(self.min_limit), self.limit * 0.75)
+                self._last_decrease = now
+        elif self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._wake()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"limit": int(self.limit), "in_flight": self.in_flight, "queued": len(self._waiters)}
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class UpstreamLimits:
+    """Global and per-route concurrency limiters for requests to the OKR server."""
+
+    def __init__(self):
+        self.global_limiter = AdaptiveLimiter(OKR_LIMIT_GLOBAL, OKR_LIMIT_ADAPTIVE)
+        self.routes = defaultdict(lambda: AdaptiveLimiter(OKR_LIMIT_PER_ROUTE, OKR_LIMIT_ADAPTIVE))
+
+    def for_route(self, route: str):
+        # take the route slot first so a queued request never sits on a global slot
+        return (self.routes[route], self.global_limiter)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "global": self.global_limiter.snapshot(),
+            "routes": {route: limiter.snapshot() for route, limiter in self.routes.items()},
+        }
+
+
+upstream_limits = UpstreamLimits()
+
+
+class LimitedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that holds a global and a per-route slot for the lifetime of each request.
+    Callers that cannot get a slot within OKR_LIMIT_QUEUE_TIMEOUT fail with httpx.PoolTimeout.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        route = upstream_route(request)
+        limiters = upstream_limits.for_route(route)
+        acquired = []
+        deadline = time.monotonic() + OKR_LIMIT_QUEUE_TIMEOUT
+        try:
+            for limiter in limiters:
+                await limiter.acquire(max(deadline - time.monotonic(), 0.0))
+                acquired.append(limiter)
+        except asyncio.TimeoutError:
+            for limiter in acquired:
+                limiter.release()
+            raise httpx.PoolTimeout(
+                f"Timed out after {OKR_LIMIT_QUEUE_TIMEOUT}s waiting for an upstream slot for {route}",
+                request=request,
+            )
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            raise
+
+        def release(size: int = 0):
+            for limiter in acquired:
+                limiter.release()
+
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException as e:
+            for limiter in acquired:
+                limiter.record(time.perf_counter() - started, isinstance(e, httpx.TimeoutException))
+            release()
+            raise
+        latency = time.perf_counter() - started
+        overloaded = response.status_code == 429 or response.status_code >= 500
+        for limiter in acquired:
+            limiter.record(latency, overloaded)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=MeteredStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without contacting the OKR server while a route's circuit is open."""
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of total upstream traffic.
+    Each request deposits `ratio` tokens and each retry withdraws one; a small
+    reserve refilled over time lets low-traffic routes retry at all.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self._tokens = 0.0
+        self._reserve = min_per_second
+        self._refilled_at = time.monotonic()
+
+    def deposit(self):
+        self._tokens = min(self._tokens + self.ratio, 100.0)
+
+    def withdraw(self) -> bool:
+        now = time.monotonic()
+        self._reserve = min(self.min_per_second, self._reserve + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        if self._reserve >= 1:
+            self._reserve -= 1
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one upstream route.
+    After OKR_BREAKER_FAILURE_THRESHOLD consecutive failures the circuit opens
+    and requests fail fast; after OKR_BREAKER_RESET_TIMEOUT a single probe is let
+    through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self):
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= OKR_BREAKER_RESET_TIMEOUT:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, failed):
+        """Record an attempt's outcome; None means it never reached the server."""
+        self._probing = False
+        if failed is None:
+            return
+        if not failed:
+            self.state = "closed"
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= OKR_BREAKER_FAILURE_THRESHOLD:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+retry_budget = RetryBudget(OKR_RETRY_BUDGET_RATIO, OKR_RETRY_BUDGET_MIN_PER_SECOND)
+circuit_breakers = defaultdict(CircuitBreaker)
+
+
+def retry_delay(attempt: int, response: httpx.Response = None) -> float:
+    """Full-jitter exponential backoff, stretched to honour a numeric Retry-After."""
+    delay = random.uniform(0, min(OKR_RETRY_MAX_DELAY, OKR_RETRY_BASE_DELAY * 2 ** attempt))
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), OKR_RETRY_MAX_DELAY))
+    return delay
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper adding a per-route circuit breaker and retries of idempotent requests.
+    GET, PUT and DELETE are retried on connection errors and 429/502/503/504
+    with jittered exponential backoff while the shared retry budget allows.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        route = upstream_route(request)
+        breaker = circuit_breakers[route]
+        retryable = request.method in IDEMPOTENT_METHODS
+        retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {route}; OKR server is failing", request=request)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.PoolTimeout, CircuitOpenError):
+                breaker.record(None)
+                raise
+            except httpx.TransportError:
+                breaker.record(True)
+                attempt += 1
+                if not (retryable and attempt < OKR_RETRY_MAX_ATTEMPTS and retry_budget.withdraw()):
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            except BaseException:
+                breaker.record(None)
+                raise
+            breaker.record(response.status_code >= 500)
+            attempt += 1
+            if not (
+                retryable
+                and response.status_code in RETRY_STATUS_CODES
+                and attempt < OKR_RETRY_MAX_ATTEMPTS
+                and retry_budget.withdraw()
+            ):
+                return response
+            await response.aclose()
+            await asyncio.sleep(retry_delay(attempt, response))
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def token_expiry(login: Dict[str, Any], token: str) -> float:
+    """Work out when a login token expires, as a time.time() timestamp."""
+    if isinstance(login.get("expires_in"), (int, float)):
+        return time.time() + login["expires_in"]
+    parts = token.split(".")
+    if len(parts) == 3:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+            return float(payload["exp"])
+        except (ValueError, KeyError, TypeError):
+            pass
+    return time.time() + OKR_TOKEN_TTL
+
+
+class TokenCache:
+    """Bounded, expiring store of login sessions keyed by email.
+    The password is kept in memory only so the token can be refreshed before it
+    expires; cache hits are checked against a salted digest of it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._salt = secrets.token_bytes(16)
+
+    def _digest(self, password: str) -> bytes:
+        return hashlib.sha256(self._salt + password.encode()).digest()
+
+    def lookup(self, email: str, password: str):
+        """Return the cached login response if it is still fresh and the password matches."""
+        entry = self._entries.get(email)
+        if entry is None or not hmac.compare_digest(entry["digest"], self._digest(password)):
+            return None
+        if entry["expires_at"] - OKR_TOKEN_REFRESH_MARGIN <= time.time():
+            return None
+        self._entries.move_to_end(email)
+        return entry["login"]
+
+    def store(self, email: str, password: str, login: Dict[str, Any]):
+        token = login.get("access_token") or login.get("token")
+        if not token:
+            return
+        self._entries.pop(email, None)
+        self._entries[email] = {
+            "token": token,
+            "login": login,
+            "password": password,
+            "digest": self._digest(password),
+            "expires_at": token_expiry(login, token),
+        }
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def can_authenticate(self, email: str) -> bool:
+        """True when token_for can produce a token for email without a new okr_login."""
+        return email in self._entries or (email == OKR_SERVICE_EMAIL and bool(OKR_SERVICE_PASSWORD))
+
+    def expire(self, email: str):
+        """Force the next token_for call to log in again (e.g. after a 401)."""
+        entry = self._entries.get(email)
+        if entry is not None:
+            entry["expires_at"] = 0.0
+
+    async def token_for(self, email: str):
+        """Return a usable token for an identity, logging in again when it is close to expiry."""
+        entry = self._entries.get(email)
+        if entry is None:
+            if email != OKR_SERVICE_EMAIL or not OKR_SERVICE_PASSWORD:
+                return None
+            password = OKR_SERVICE_PASSWORD
+        elif entry["expires_at"] - OKR_TOKEN_REFRESH_MARGIN > time.time():
+            self._entries.move_to_end(email)
+            return entry["token"]
+        else:
+            password = entry["password"]
+        try:
+            await single_flight.do(("login", email), lambda: login(email, password))
+        except Exception:
+            # keep using the old token until it actually expires
+            if entry is None or entry["expires_at"] <= time.time():
+                raise
+            return entry["token"]
+        entry = self._entries.get(email)
+        return entry["token"] if entry else None
+
+
+token_cache = TokenCache(OKR_TOKEN_CACHE_SIZE)
+# MCP session -> email it logged in as; entries disappear with the session
+_session_identities = weakref.WeakKeyDictionary()
+# set by background work done on behalf of a specific identity, e.g. write-behind flushes
+_identity_override = contextvars.ContextVar("identity_override", default=None)
+
+
+def current_session():
+    try:
+        return mcp.get_context().session
+    except ValueError:
+        return None
+
+
+def current_identity() -> str:
+    """Email whose token authenticates the current call ("" when anonymous)."""
+    override = _identity_override.get()
+    if override is not None:
+        return override
+    session = current_session()
+    if session is not None and session in _session_identities:
+        return _session_identities[session]
+    return OKR_SERVICE_EMAIL or ""
+
+
+async def login(email: str, password: str) -> Dict[str, Any]:
+    """Log in to the OKR server and cache the resulting session token."""
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/login",
+        json={
+            "email": email,
+            "password": password
+        },
+        auth=None,
+    )
+    if response.status_code == 200:
+        data = response.json()
+        token_cache.store(email, password, data)
+        return data
+    else:
+        raise Exception(f"Login failed: {response.text}")
+
+
+class SessionTokenAuth(httpx.Auth):
+    """Adds the current identity's cached Bearer token to upstream requests.
+    A 401 drops the token and retries once with a fresh login.
+    """
+
+    async def async_auth_flow(self, request: httpx.Request):
+        identity = current_identity()
+        token = await token_cache.token_for(identity) if identity else None
+        if token is None:
+            yield request
+            return
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            token_cache.expire(identity)
+            fresh = await token_cache.token_for(identity)
+            if fresh is not None and fresh != token:
+                request.headers["Authorization"] = f"Bearer {fresh}"
+                yield request
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it on first use.
+    Every tool and resource goes through this client so connections to the
+    OKR server are pooled and kept alive between calls.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=OKR_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=OKR_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=OKR_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=OKR_HTTP2,
+        )
+        _http_client = httpx.AsyncClient(
+            transport=ResilientTransport(LimitedTransport(MeteredTransport(transport))),
+            timeout=OKR_HTTP_TIMEOUT,
+            auth=SessionTokenAuth(),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared upstream client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@asynccontextmanager
+async def app_lifespan(app):
+    """Process-wide startup/shutdown for the server.
+    FastMCP's own lifespan runs once per client session, so this is attached
+    to the ASGI app (or wrapped around the stdio loop) instead.
+    """
+    get_http_client()
+    background = []
+    if OKR_MIRROR_ENABLED:
+        background.append(asyncio.create_task(reference_mirror.run()))
+    background.append(asyncio.create_task(upstream_health.run()))
+    background.append(asyncio.create_task(resource_subscriptions.run()))
+    if OKR_WRITE_BEHIND:
+        background.append(asyncio.create_task(write_behind.run()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        if OKR_WRITE_BEHIND:
+            # whatever is not sent now stays queued for the next start
+            try:
+                await asyncio.wait_for(write_behind.flush(), OKR_HTTP_TIMEOUT)
+            except Exception as e:
+                logger.warning("Write-behind flush on shutdown failed: %s", e)
+        await close_http_client()
+
+
+class ResponseCache:
+    """In-process cache of parsed upstream list responses.
+    Entries expire after their TTL and the least recently used ones are evicted
+    once the total size of the cached response bodies exceeds max_bytes.
+    Every invalidation bumps a per-key generation so a read that was already in
+    flight when a write landed cannot put the stale list back into the cache.
+    Entries are scoped by identity; invalidating a key drops it for everyone.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._bytes = 0
+
+    def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    def get(self, key: str, scope: str = ""):
+        entry = self._entries.get((key, scope))
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._remove((key, scope))
+            return None
+        self._entries.move_to_end((key, scope))
+        return value
+
+    def set(self, key: str, value, size: int, ttl: float, generation: int, scope: str = ""):
+        if ttl <= 0 or size > self.max_bytes or generation != self.generation(key):
+            return
+        self._remove((key, scope))
+        self._entries[(key, scope)] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._generations[key] = self.generation(key) + 1
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] in keys]:
+            self._remove(entry_key)
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+response_cache = ResponseCache(OKR_CACHE_MAX_BYTES)
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one.
+    The first caller for a key starts the call; callers arriving while it is in
+    flight wait on the same task and all receive its result or exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, call):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield so one waiter being cancelled does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # mark the exception as retrieved even if every waiter went away
+            task.exception()
+
+
+single_flight = SingleFlight()
+
+
+# Whole-collection lists that can be large; their parsed bodies are not kept in the shared
+# conditional cache (the list resources stream them, the subscription poller keeps its own)
+BULK_LIST_PATHS = frozenset(("/leaves/", "/time_sheets/", "/objectives/", "/project_allocations/", "/key_results/"))
+# Parsed JSON takes roughly this many times the bytes of the raw body
+PARSED_SIZE_FACTOR = 3
+
+
+class ConditionalCache:
+    """Last response seen for each (identity, path) read from the OKR server.
+    Its ETag and Last-Modified are sent back as If-None-Match and If-Modified-Since,
+    and a 304 reuses the parsed body. When the server sends no validators, a hash
+    of the new body decides whether the previous parse can be reused, so unchanged
+    data comes back as the very same object and callers can skip work with `is`.
+    Entries are charged at PARSED_SIZE_FACTOR times their raw size, and least
+    recently used entries are dropped once that exceeds max_bytes. Paths in
+    skip_paths are never stored.
+    """
+
+    def __init__(self, max_bytes: int, skip_paths=frozenset()):
+        self.max_bytes = max_bytes
+        self.skip_paths = skip_paths
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def get(self, key):
+        """Return (etag, last_modified, digest, data, size) for key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key, etag, last_modified, digest, data, size: int):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[4] * PARSED_SIZE_FACTOR
+        if key[1] in self.skip_paths or size * PARSED_SIZE_FACTOR > self.max_bytes:
+            return
+        self._entries[key] = (etag, last_modified, digest, data, size)
+        self._bytes += size * PARSED_SIZE_FACTOR
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[4] * PARSED_SIZE_FACTOR
+
+    def forget(self, path: str):
+        """Drop the entries of every identity for path."""
+        for key in [key for key in self._entries if key[1] == path]:
+            self._bytes -= self._entries.pop(key)[4] * PARSED_SIZE_FACTOR
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "changed": self.changed,
+        }
+
+
+conditional_cache = ConditionalCache(OKR_CONDITIONAL_MAX_BYTES, BULK_LIST_PATHS)
+
+
+async def fetch_json(path: str, error: str, cache: ConditionalCache = conditional_cache):
+    """GET a path from the OKR server and return its parsed body and size in bytes.
+    The request is made conditional on the last response for the same path in
+    cache, and an unchanged body is returned as the previously parsed object.
+    """
+    client = get_http_client()
+    key = (current_identity(), path)
+    entry = cache.get(key)
+    headers = {}
+    if entry is not None:
+        etag, last_modified = entry[0], entry[1]
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    response = await client.get(
+        f"{OKR_SERVER_URL}{path}",
+        headers=headers,
+    )
+    if response.status_code == 304 and entry is not None:
+        cache.not_modified += 1
+        return entry[3], entry[4]
+    if response.status_code == 200:
+        size = len(response.content)
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if entry is not None and entry[2] == digest:
+            cache.unchanged += 1
+            data = entry[3]
+        else:
+            cache.changed += 1
+            data = json_loads(response.content)
+        cache.store(
+            key, response.headers.get("etag"), response.headers.get("last-modified"), digest, data, size
+        )
+        return data, size
+    else:
+        raise Exception(f"{error}: {response.text}")
+
+
+async def get_json(path: str, error: str):
+    """GET a path from the OKR server, sharing the request with identical concurrent reads."""
+    # scoped by identity so callers never share a response fetched with someone else's token
+    data, _ = await single_flight.do((current_identity(), path), lambda: fetch_json(path, error))
+    return data
+
+
+async def get_cached_list(key: str, path: str, error: str):
+    """Fetch a reference list from the OKR server, serving it from the cache when fresh."""
+    if reference_mirror.ready(key):
+        return reference_mirror.tables[key].find()
+    identity = current_identity()
+    cached = response_cache.get(key, identity)
+    if cached is not None:
+        return cached
+    generation = response_cache.generation(key)
+    # include the generation so reads started after a write never join a stale flight
+    data, size = await single_flight.do((identity, path, generation), lambda: fetch_json(path, error))
+    response_cache.set(key, data, size, OKR_CACHE_TTLS[key], generation, identity)
+    return data
+
+
+MIRROR_COLLECTIONS = {
+    "employees": "/employees/",
+    "departments": "/departments/",
+    "roles": "/roles/",
+    "leave_types": "/leave_types/",
+    "projects": "/projects/",
+}
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MirrorTable:
+    """Local copy of one reference collection with hash indexes on id, email and name,
+    plus sorted name/email lists for prefix search and a trigram index for fuzzy search.
+    A sync diffs the new snapshot against the current one and only re-indexes
+    records that were added, changed or removed.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_email = {}
+        self.by_name = defaultdict(dict)
+        self.sorted_names = []
+        self.sorted_emails = []
+        self.by_trigram = defaultdict(set)
+        self.trigram_counts = {}  # record id -> number of distinct trigrams in its name
+        self.synced_at = None
+        self.stale = True
+        self.source = None
+
+    def apply(self, records: List[Dict[str, Any]]) -> int:
+        """Replace the table contents with a fresh snapshot and return the number of changed records."""
+        fresh = {record.get("id"): record for record in records}
+        changed = 0
+        for record_id in [record_id for record_id in self.by_id if record_id not in fresh]:
+            self._unindex(self.by_id.pop(record_id))
+            changed += 1
+        for record_id, record in fresh.items():
+            current = self.by_id.get(record_id)
+            if current == record:
+                continue
+            if current is not None:
+                self._unindex(current)
+            self.by_id[record_id] = record
+            self._index(record)
+            changed += 1
+        self.synced_at = time.time()
+        return changed
+
+    def find(self, id=None, email=None, name=None) -> List[Dict[str, Any]]:
+        if id is not None:
+            record = self.by_id.get(id)
+            return [record] if record is not None else []
+        if email is not None:
+            record = self.by_email.get(email.lower())
+            return [record] if record is not None else []
+        if name is not None:
+            return list(self.by_name.get(name.strip().lower(), {}).values())
+        return list(self.by_id.values())
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Rank records against a free-text query and return the top matches with a score.
+        Exact email/name hits score 1.0, name or email prefixes 0.9, and other
+        names by trigram similarity (Jaccard, scaled to at most 0.8).
+        Similarity below 0.2 needs fewer than a fifth of the query trigrams in
+        common, so only records found under the rarest len - ceil(len / 5) + 1
+        query trigrams are candidates; the others cannot reach the threshold.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        scores = {}
+
+        def hit(record_id, score):
+            if score > scores.get(record_id, 0.0):
+                scores[record_id] = score
+
+        record = self.by_email.get(query)
+        if record is not None:
+            hit(record.get("id"), 1.0)
+        for record_id in self.by_name.get(query, {}):
+            hit(record_id, 1.0)
+        for sorted_keys in (self.sorted_names, self.sorted_emails):
+            i = bisect_left(sorted_keys, (query,))
+            while i < len(sorted_keys) and sorted_keys[i][0].startswith(query) and len(scores) < limit * 4:
+                hit(sorted_keys[i][1], 0.9)
+                i += 1
+        postings = sorted((self.by_trigram.get(trigram, ()) for trigram in trigrams(query)), key=len)
+        needed = max(1, -(-len(postings) // 5))
+        candidates = set().union(*postings[:len(postings) - needed + 1])
+        for record_id in candidates:
+            count = sum(1 for posting in postings if record_id in posting)
+            similarity = count / (len(postings) + self.trigram_counts[record_id] - count)
+            if similarity >= 0.2:
+                hit(record_id, 0.8 * similarity)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [{"score": round(score, 3), "record": self.by_id[record_id]} for record_id, score in ranked]
+
+    def _index(self, record):
+        record_id = record.get("id")
+        if isinstance(record.get("email"), str):
+            email = record["email"].lower()
+            self.by_email[email] = record
+            insort(self.sorted_emails, (email, record_id))
+        if isinstance(record.get("name"), str):
+            name = record["name"].strip().lower()
+            self.by_name[name][record_id] = record
+            for key in self._prefix_keys(name):
+                insort(self.sorted_names, (key, record_id))
+            name_trigrams = trigrams(name)
+            for trigram in name_trigrams:
+                self.by_trigram[trigram].add(record_id)
+            self.trigram_counts[record_id] = len(name_trigrams)
+
+    def _unindex(self, record):
+        record_id = record.get("id")
+        if isinstance(record.get("email"), str):
+            email = record["email"].lower()
+            self.by_email.pop(email, None)
+            self._remove_sorted(self.sorted_emails, (email, record_id))
+        if isinstance(record.get("name"), str):
+            name = record["name"].strip().lower()
+            self.by_name[name].pop(record_id, None)
+            if not self.by_name[name]:
+                del self.by_name[name]
+            for key in self._prefix_keys(name):
+                self._remove_sorted(self.sorted_names, (key, record_id))
+            for trigram in trigrams(name):
+                self.by_trigram[trigram].discard(record_id)
+                if not self.by_trigram[trigram]:
+                    del self.by_trigram[trigram]
+            self.trigram_counts.pop(record_id, None)
+
+    @staticmethod
+    def _prefix_keys(name: str):
+        """The full name plus each later word, so "gem" finds "Project Gemini"."""
+        words = name.split()
+        return {name} | {" ".join(words[i:]) for i in range(1, len(words))}
+
+    @staticmethod
+    def _remove_sorted(sorted_keys, key):
+        i = bisect_left(sorted_keys, key)
+        if i < len(sorted_keys) and sorted_keys[i] == key:
+            del sorted_keys[i]
+
+
+class ReferenceMirror:
+    """In-memory read replica of employees, departments, roles, leave types and projects.
+    The whole mirror is re-synced every OKR_MIRROR_SYNC_INTERVAL seconds, and a
+    collection changed by one of this server's write tools is marked stale and
+    re-synced right away; stale collections are read from upstream meanwhile.
+    """
+
+    def __init__(self):
+        self.tables = {name: MirrorTable() for name in MIRROR_COLLECTIONS}
+        self._stale = asyncio.Event()
+
+    def ready(self, name: str) -> bool:
+        table = self.tables.get(name)
+        return OKR_MIRROR_ENABLED and table is not None and not table.stale
+
+    def mark_stale(self, *names: str):
+        for name in names:
+            if name in self.tables:
+                self.tables[name].stale = True
+                self._stale.set()
+
+    async def sync(self, *names: str):
+        for name in names or tuple(self.tables):
+            table = self.tables[name]
+            # clear the flag first so a write landing during the fetch re-marks it
+            table.stale = False
+            try:
+                records, _ = await fetch_json(MIRROR_COLLECTIONS[name], f"Sync {name} failed")
+            except Exception:
+                table.stale = True
+                raise
+            if records is table.source:
+                # same body as the last sync, nothing to diff
+                table.synced_at = time.time()
+                continue
+            changed = table.apply(records)
+            table.source = records
+            if changed:
+                logger.info("Mirror synced %s: %d changed of %d", name, changed, len(table.by_id))
+
+    async def run(self):
+        """Background sync loop started by app_lifespan when the mirror is enabled."""
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Mirror sync failed: %s", e)
+            try:
+                await asyncio.wait_for(self._stale.wait(), OKR_MIRROR_SYNC_INTERVAL)
+            except asyncio.TimeoutError:
+                continue
+            self._stale.clear()
+            stale = [name for name, table in self.tables.items() if table.stale]
+            try:
+                await self.sync(*stale)
+            except Exception as e:
+                logger.warning("Mirror sync failed: %s", e)
+
+
+reference_mirror = ReferenceMirror()
+
+
+# Indexed tables built from the cached lists when the mirror is disabled, keyed by
+# (identity, collection) like the cache entries they index
+_lookup_tables = OrderedDict()
+
+
+async def reference_table(name: str) -> MirrorTable:
+    """Return an indexed table for a reference collection.
+    Uses the mirror when it is current; otherwise re-indexes the caller's cached
+    list, incrementally and only when the cache has handed out a new copy.
+    Tables are updated in place, so callers that await after this must copy
+    what they keep (e.g. dict(table.by_id)).
+    """
+    if reference_mirror.ready(name):
+        return reference_mirror.tables[name]
+    key = (current_identity(), name)
+    records = await get_cached_list(name, MIRROR_COLLECTIONS[name], f"Get {name} failed")
+    table = _lookup_tables.get(key)
+    if table is None:
+        table = _lookup_tables[key] = MirrorTable()
+        while len(_lookup_tables) > OKR_LOOKUP_TABLES_MAX:
+            _lookup_tables.popitem(last=False)
+    _lookup_tables.move_to_end(key)
+    if table.source is not records:
+        table.apply(records)
+        table.source = records
+    return table
+
+
+def reference_data_changed(*keys: str):
+    """Called by write tools after a successful write to drop local copies of the changed lists."""
+    response_cache.invalidate(*keys)
+    reference_mirror.mark_stale(*keys)
+    if "employees" in keys:
+        progress_engine.departments_stale = True
+    for key in keys:
+        resource_subscriptions.changed(key)
+
+
+class UpstreamHealth:
+    """Readiness of this process to serve traffic.
+    Ready once the warm-up has opened pooled connections to the OKR server and
+    filled the cache with the OKR_WARMUP_KEYS lists, and for as long as the
+    periodic probe of OKR_PROBE_PATH keeps succeeding. The probe also re-warms
+    those lists when their cache entries expire.
+    """
+
+    def __init__(self):
+        self.warmed = False
+        self.failures = 0
+        self.last_probe = None
+        self.last_latency = None
+        self.last_error = None
+
+    def ready(self) -> bool:
+        return self.warmed and self.failures < OKR_PROBE_FAILURE_THRESHOLD
+
+    async def warm_up(self):
+        # fetched concurrently, which also opens several pooled connections
+        await asyncio.gather(*(
+            get_cached_list(key, MIRROR_COLLECTIONS[key], f"Warm-up of {key} failed")
+            for key in OKR_WARMUP_KEYS
+        ))
+
+    async def probe(self):
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().get(f"{OKR_SERVER_URL}{OKR_PROBE_PATH}")
+            if response.status_code >= 500:
+                raise Exception(f"Probe failed: {response.status_code}")
+            await self.warm_up()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e) or type(e).__name__
+            logger.warning("Upstream probe failed (%d in a row): %s", self.failures, self.last_error)
+        else:
+            self.failures = 0
+            self.last_error = None
+        self.last_probe = time.time()
+        self.last_latency = time.perf_counter() - started
+
+    async def run(self):
+        """Warm-up followed by the periodic probe, started by app_lifespan."""
+        delay = 0.1
+        while not self.warmed:
+            try:
+                await self.warm_up()
+                self.warmed = True
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.warning("Warm-up failed, retrying in %.1fs: %s", delay, self.last_error)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, OKR_PROBE_INTERVAL)
+        while True:
+            await asyncio.sleep(OKR_PROBE_INTERVAL)
+            await self.probe()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready(),
+            "warmed": self.warmed,
+            "consecutive_failures": self.failures,
+            "last_probe": self.last_probe,
+            "last_probe_seconds": self.last_latency,
+            "last_error": self.last_error,
+        }
+
+
+upstream_health = UpstreamHealth()
+
+
+# Subscribable collections: upstream list path, list resource URI and per-record resource template
+WATCHED_COLLECTIONS = {
+    "leaves": ("/leaves/", "leaves://leaveslist", "leaves://employee/{employee_id}"),
+    "time_sheets": ("/time_sheets/", "timesheets://timesheetslist", "timesheets://employee/{employee_id}"),
+    "objectives": ("/objectives/", "objectives://objectiveslist", "objectives://employee/{employee_id}"),
+    "project_allocations": (
+        "/project_allocations/", "projects://projectAllocationlist", "projects://projectAllocationlist/{project_id}"
+    ),
+    "employees": ("/employees/", "employees://employeeslist", None),
+    "roles": ("/roles/", "roles://roleslist", None),
+    "departments": ("/departments/", "departments://departmentslist", None),
+    "leave_types": ("/leave_types/", "leaveTypes://leavetypeslist", None),
+    "projects": ("/projects/", "projects://projectslist", None),
+}
+
+
+class ResourceSubscriptions:
+    """resources/subscribe support for the list resources and their per-employee
+    or per-project and /fields/ variants.
+    One background poller fetches each collection that has subscribers (as a
+    conditional GET, so unchanged lists cost a 304 or a hash), diffs it against
+    the previous snapshot and sends resources/updated to the sessions subscribed
+    to the affected URIs. Successful writes made through this server notify right
+    away, and the next poll does not repeat those notifications.
+    Sessions are held weakly and dropped when they go away or a send fails, and URIs and
+    collection snapshots that nothing watches any more are dropped with them.
+    Notifications only carry the URI, so clients re-read with their own token.
+    """
+
+    def __init__(self):
+        self.sessions = {}  # uri -> WeakSet of sessions
+        self.targets = {}  # uri -> (collection, field, value)
+        self.snapshots = {}  # collection -> {id: record}
+        self.sources = {}  # collection -> list object the snapshot was built from
+        self.notified = set()  # uris notified by writes since the last poll
+        # validators for the polled lists; the bodies it holds are the ones in self.sources
+        self.conditional = ConditionalCache(float("inf"))
+        self._tasks = set()
+
+    def target(self, uri: str):
+        """Return (collection, field, value) watched for uri; field is None for a whole list."""
+        for name, (_, list_uri, template) in WATCHED_COLLECTIONS.items():
+            if uri == list_uri or uri.startswith(f"{list_uri}/fields/"):
+                return name, None, None
+            if template is not None:
+                prefix, field = template.split("{")
+                if uri.startswith(prefix) and uri[len(prefix):].isdigit():
+                    return name, field.rstrip("}"), int(uri[len(prefix):])
+        raise ValueError(f"Resource {uri} does not support subscriptions")
+
+    def subscribe(self, uri: str, session):
+        if session is None:
+            raise ValueError("Subscriptions need a client session")
+        self.targets[uri] = self.target(uri)
+        self.sessions.setdefault(uri, weakref.WeakSet()).add(session)
+
+    def unsubscribe(self, uri: str, session):
+        subscribers = self.sessions.get(uri)
+        if subscribers is not None:
+            subscribers.discard(session)
+            if not subscribers:
+                self._prune()
+
+    def _prune(self):
+        """Forget URIs nobody is subscribed to, and the snapshots of collections nothing watches."""
+        for uri in [uri for uri, subscribers in self.sessions.items() if not subscribers]:
+            del self.sessions[uri]
+            self.targets.pop(uri, None)
+        watched = {collection for collection, _, _ in self.targets.values()}
+        for name in [name for name in self.snapshots if name not in watched]:
+            del self.snapshots[name]
+            self.sources.pop(name, None)
+            self.conditional.forget(WATCHED_COLLECTIONS[name][0])
+        return watched
+
+    def _affected(self, name: str, records) -> set:
+        uris = set()
+        for uri, (collection, field, value) in self.targets.items():
+            if collection == name and self.sessions.get(uri):
+                if field is None or any(record.get(field) == value for record in records):
+                    uris.add(uri)
+        return uris
+
+    async def _notify(self, uris):
+        async def send(uri, session):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception as e:
+                logger.info("Dropping subscription to %s: %s", uri, e)
+                self.unsubscribe(uri, session)
+
+        await asyncio.gather(*(
+            send(uri, session) for uri in uris for session in list(self.sessions.get(uri, ()))
+        ))
+
+    def changed(self, name: str, *records: Dict[str, Any]):
+        """Called by write tools after a successful write to notify subscribers right away.
+        Pass the written records so per-employee and per-project URIs can be matched;
+        the last polled version of each record is matched too.
+        """
+        snapshot = self.snapshots.get(name, {})
+        records = [record for record in records if isinstance(record, dict)]
+        records += [snapshot[record["id"]] for record in records if record.get("id") in snapshot]
+        uris = self._affected(name, records)
+        if not uris:
+            return
+        self.notified |= uris
+        task = asyncio.create_task(self._notify(uris))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def poll(self):
+        # sessions that went away without unsubscribing leave empty WeakSets behind
+        watched = self._prune()
+        notified, self.notified = self.notified, set()
+        for name in watched:
+            path = WATCHED_COLLECTIONS[name][0]
+            records, _ = await fetch_json(path, f"Poll of {name} failed", self.conditional)
+            if records is self.sources.get(name):
+                continue
+            fresh = {record.get("id"): record for record in records}
+            previous = self.snapshots.get(name)
+            self.snapshots[name], self.sources[name] = fresh, records
+            if previous is None:
+                continue  # first poll only sets the baseline
+            changes = [record for record_id, record in fresh.items() if previous.get(record_id) != record]
+            changes += [record for record_id, record in previous.items() if fresh.get(record_id) != record]
+            if changes:
+                await self._notify(self._affected(name, changes) - notified)
+
+    async def run(self):
+        """Background poll loop started by app_lifespan."""
+        while True:
+            await asyncio.sleep(OKR_SUBSCRIPTION_POLL_INTERVAL)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning("Subscription poll failed: %s", e)
+
+
+resource_subscriptions = ResourceSubscriptions()
+
+
+class WriteBehindQueue:
+    """Durable local queue of upstream writes, stored in SQLite (WAL mode, so an
+    acknowledged write survives a crash or restart of this process).
+    Each write is stored with the identity that made it and sent with that
+    identity's token. Its password is never stored, so after a restart the
+    writes of a session login are skipped, without counting an attempt, until
+    that user logs in again through okr_login on this worker. Writes that
+    share a coalesce key (the key result id for update_key_result) replace each
+    other while queued, so only the latest update is sent. The flusher sends up
+    to OKR_WRITE_BEHIND_BATCH writes every OKR_WRITE_BEHIND_INTERVAL seconds
+    with at most OKR_WRITE_BEHIND_CONCURRENCY in flight. A write that fails
+    OKR_WRITE_BEHIND_MAX_ATTEMPTS times is kept, but no longer retried until a
+    flush with retry_failed.
+    Several worker processes may share the queue file: each batch is claimed
+    in one BEGIN IMMEDIATE transaction before it is sent, so a write goes out
+    from one worker only. A claim left by a worker that died is taken over
+    once it is older than OKR_WRITE_BEHIND_LEASE seconds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._db = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def db(self) -> "sqlite3.Connection":
+        if self._db is None:
+            import sqlite3
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            # anonymous writes go out as they would without write-behind
+            self._db.create_function("sendable", 1, lambda identity: not identity or token_cache.can_authenticate(identity))
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS pending (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    identity TEXT NOT NULL,
+                    coalesce_key TEXT UNIQUE,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    queued_at REAL NOT NULL,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                )"""
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+            for column, kind in (("claimed_by", "TEXT"), ("claimed_at", "REAL")):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE pending ADD COLUMN {column} {kind}")
+        return self._db
+
+    def enqueue(self, kind: str, method: str, path: str, payload: Dict[str, Any], coalesce_key: Optional[str] = None):
+        """Store a write and return the acknowledgement handed back to the caller."""
+        cursor = self.db.execute(
+            """INSERT INTO pending (kind, method, path, payload, identity, coalesce_key, queued_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(coalesce_key) DO UPDATE SET
+                   payload = excluded.payload, identity = excluded.identity, version = version + 1,
+                   attempts = 0, last_error = NULL
+               RETURNING id, version""",
+            (kind, method, path, json_dumps(payload), current_identity(), coalesce_key, time.time()),
+        )
+        queue_id, version = cursor.fetchone()
+        if version:
+            self.coalesced += 1
+        depth = self.depth()
+        if depth >= OKR_WRITE_BEHIND_BATCH:
+            self._wake.set()
+        return {"queued": True, "queue_id": queue_id, "coalesced": bool(version), "pending": depth}
+
+    def depth(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM pending WHERE attempts < ?", (OKR_WRITE_BEHIND_MAX_ATTEMPTS,)
+        ).fetchone()[0]
+
+    async def _send(self, row):
+        queue_id, kind, method, path, payload, identity, version = row
+        token = _identity_override.set(identity)
+        try:
+            response = await get_http_client().request(method, f"{OKR_SERVER_URL}{path}", content=payload,
+                                                       headers={"Content-Type": "application/json"})
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        else:
+            error = None if response.status_code < 300 else f"{response.status_code}: {response.text}"
+        finally:
+            _identity_override.reset(token)
+        if error is not None:
+            self.errors += 1
+            self.db.execute(
+                "UPDATE pending SET attempts = attempts + 1, last_error = ? WHERE id = ? AND version = ?",
+                (error, queue_id, version),
+            )
+            self._release(queue_id)
+            return False
+        # a newer coalesced update that arrived while this one was in flight stays queued
+        self.db.execute("DELETE FROM pending WHERE id = ? AND version = ?", (queue_id, version))
+        self._release(queue_id)
+        self.sent += 1
+        try:
+            result = json_loads(response.content)
+        except ValueError:
+            result = None
+        write_behind_applied(kind, json_loads(payload), result)
+        return True
+
+    def _claim(self, last_id: int):
+        """Claim the next batch of unsent writes after last_id for this worker and return them."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute(
+                """UPDATE pending SET claimed_by = ?, claimed_at = ?
+                   WHERE id IN (
+                       SELECT id FROM pending
+                       WHERE attempts < ? AND id > ? AND sendable(identity)
+                         AND (claimed_by IS NULL OR claimed_by = ? OR claimed_at < ?)
+                       ORDER BY id LIMIT ?
+                   )
+                   RETURNING id, kind, method, path, payload, identity, version""",
+                (self.owner, now, OKR_WRITE_BEHIND_MAX_ATTEMPTS, last_id, self.owner,
+                 now - OKR_WRITE_BEHIND_LEASE, OKR_WRITE_BEHIND_BATCH),
+            ).fetchall()
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return sorted(rows)
+
+    def _release(self, queue_id: int):
+        self.db.execute("UPDATE pending SET claimed_by = NULL WHERE id = ? AND claimed_by = ?", (queue_id, self.owner))
+
+    async def flush(self, retry_failed: bool = False) -> Dict[str, int]:
+        """Send everything queued now, batch by batch; returns the number sent and failed."""
+        if not OKR_WRITE_BEHIND:
+            return {"sent": 0, "failed": 0}
+        async with self._flush_lock:
+            if retry_failed:
+                self.db.execute("UPDATE pending SET attempts = 0")
+            semaphore = asyncio.Semaphore(OKR_WRITE_BEHIND_CONCURRENCY)
+            sent = failed = 0
+            last_id = 0
+
+            async def send(row):
+                async with semaphore:
+                    return await self._send(row)
+
+            while True:
+                # claims of this worker can only be left over from a cancelled flush
+                rows = self._claim(last_id)
+                if not rows:
+                    return {"sent": sent, "failed": failed}
+                last_id = rows[-1][0]
+                results = await asyncio.gather(*(send(row) for row in rows))
+                sent += sum(results)
+                failed += len(results) - sum(results)
+
+    def status(self) -> Dict[str, Any]:
+        if not OKR_WRITE_BEHIND:
+            # never create the queue file just to report that there is none
+            return {"enabled": False}
+        by_kind = dict(self.db.execute(
+            "SELECT kind, COUNT(*) FROM pending WHERE attempts < ? GROUP BY kind", (OKR_WRITE_BEHIND_MAX_ATTEMPTS,)
+        ).fetchall())
+        oldest = self.db.execute(
+            "SELECT MIN(queued_at) FROM pending WHERE attempts < ?", (OKR_WRITE_BEHIND_MAX_ATTEMPTS,)
+        ).fetchone()[0]
+        awaiting_login = self.db.execute(
+            "SELECT COUNT(*) FROM pending WHERE attempts < ? AND NOT sendable(identity)", (OKR_WRITE_BEHIND_MAX_ATTEMPTS,)
+        ).fetchone()[0]
+        failed = [
+            {"queue_id": queue_id, "kind": kind, "path": path, "attempts": attempts, "last_error": last_error}
+            for queue_id, kind, path, attempts, last_error in self.db.execute(
+                "SELECT id, kind, path, attempts, last_error FROM pending WHERE attempts >= ? ORDER BY id LIMIT 50",
+                (OKR_WRITE_BEHIND_MAX_ATTEMPTS,),
+            )
+        ]
+        return {
+            "enabled": OKR_WRITE_BEHIND,
+            "pending": sum(by_kind.values()),
+            "pending_by_kind": by_kind,
+            "oldest_queued_seconds": round(time.time() - oldest, 3) if oldest is not None else None,
+            "awaiting_login": awaiting_login,
+            "failed": failed,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "send_errors": self.errors,
+        }
+
+    async def run(self):
+        """Background flush loop started by app_lifespan when write-behind is enabled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), OKR_WRITE_BEHIND_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Write-behind flush failed: %s", e)
+
+
+write_behind = WriteBehindQueue(OKR_WRITE_BEHIND_PATH)
+
+
+def write_behind_applied(kind: str, payload: Dict[str, Any], result):
+    """Side effects of a queued write once the OKR server has accepted it."""
+    if kind == "time_sheet":
+        resource_subscriptions.changed("time_sheets", payload, result)
+
+
+async def run_batch(create, records: List[Dict[str, Any]]):
+    """Call create(**record) for every record with bounded concurrency.
+    A failing record is reported in its own result entry and does not stop
+    the rest of the batch.
+    """
+    semaphore = asyncio.Semaphore(OKR_BATCH_CONCURRENCY)
+
+    async def run_one(index: int, record: Dict[str, Any]):
+        async with semaphore:
+            try:
+                return {"index": index, "ok": True, "result": await create(**record)}
+            except Exception as e:
+                return {"index": index, "ok": False, "error": str(e)}
+
+    results = await asyncio.gather(*(run_one(i, record) for i, record in enumerate(records)))
+    succeeded = sum(1 for result in results if result["ok"])
+    return {
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except ValueError:
+        raise Exception(f"Invalid cursor: {cursor}")
+
+
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+_JSON_VALUE_END = frozenset(" \t\r\n,]")
+
+
+async def iter_json_array(chunks):
+    """Incrementally parse a JSON array from an async iterator of byte chunks.
+    Each element is yielded as soon as it is complete, so only the element
+    being parsed and the unconsumed tail of the last chunk are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        pos = 0
+        while True:
+            pos = _JSON_SEPARATORS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array from the OKR server")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element continues in the next chunk
+            if not isinstance(item, (dict, list, str)) and (end == len(buffer) or buffer[end] not in _JSON_VALUE_END):
+                break  # a number such as "-15" may continue as "-15.5e3" in the next chunk
+            yield item
+            pos = end
+        buffer = buffer[pos:]
+    raise ValueError("Truncated JSON array from the OKR server")
+
+
+async def iter_json_list(path: str, error: str, method: str = "GET"):
+    """Yield the records of a JSON array returned by the OKR server one at a time.
+    In streaming mode the body is parsed as it arrives and the connection is
+    released as soon as the caller stops iterating; otherwise it is buffered.
+    """
+    client = get_http_client()
+    async with client.stream(method, f"{OKR_SERVER_URL}{path}") as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"{error}: {response.text}")
+        if not OKR_STREAMING:
+            await response.aread()
+            for record in json_loads(response.content):
+                yield record
+            return
+        async with aclosing(iter_json_array(response.aiter_bytes())) as records:
+            async for record in records:
+                yield record
+
+
+async def get_json_list(path: str, error: str, fields=None):
+    """Read a whole list from the OKR server through iter_json_list, record by record.
+    Requested fields are projected as records arrive, so only the projected list is
+    kept, and the raw body is never buffered next to it. Concurrent identical reads
+    share one request.
+    """
+    project = projection(fields)
+
+    async def read():
+        async with aclosing(iter_json_list(path, error)) as records:
+            return [record if project is None else project(record) async for record in records]
+
+    return await single_flight.do((current_identity(), path, project), read)
+
+
+def record_filter(
+    employee_ids=None,
+    date_field: Optional[str] = None,
+    end_field: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    **equals,
+):
+    """Build a predicate that passes the records matching every given filter.
+    With end_field set, the date filter keeps records whose
+    [date_field, end_field] span overlaps [start_date, end_date].
+    Dates are compared as ISO strings, truncated to the bound's precision.
+    """
+    equals = {key: value for key, value in equals.items() if value is not None}
+
+    def matches(record) -> bool:
+        if employee_ids is not None and record.get("employee_id") not in employee_ids:
+            return False
+        if start_date and str(record.get(end_field or date_field, ""))[:len(start_date)] < start_date:
+            return False
+        if end_date and str(record.get(date_field, ""))[:len(end_date)] > end_date:
+            return False
+        return all(record.get(key) == value for key, value in equals.items())
+
+    return matches
+
+
+@lru_cache(maxsize=256)
+def compile_projection(fields: tuple):
+    """Build (once per distinct fieldset) a function keeping only the given keys of a record."""
+
+    def project(record):
+        if not isinstance(record, dict):
+            return record
+        return {field: record[field] for field in fields if field in record}
+
+    return project
+
+
+def projection(fields):
+    """Return the compiled projection for a list or comma-separated string of fields, or None for all fields."""
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    fields = tuple(field.strip() for field in fields or () if field.strip())
+    return compile_projection(fields) if fields else None
+
+
+def project_fields(data, fields):
+    """Apply a sparse fieldset to a record or a list of records."""
+    project = projection(fields)
+    if project is None:
+        return data
+    if isinstance(data, list):
+        return [project(record) for record in data]
+    return project(data)
+
+
+async def paginate(records, matches, limit: int, cursor: Optional[str], fields=None):
+    """Take one page of matching records from an async record iterator.
+    Iteration stops as soon as the page is known to be full, so the rest of
+    the upstream response is never downloaded or parsed. Requested fields are
+    projected record by record as the page is collected.
+    """
+    limit = max(1, min(limit, OKR_PAGE_MAX_LIMIT))
+    offset = decode_cursor(cursor)
+    project = projection(fields) or (lambda record: record)
+    page = []
+    skipped = 0
+    async with aclosing(records):
+        async for record in records:
+            if not matches(record):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            page.append(project(record))
+            if len(page) > limit:
+                break
+    has_more = len(page) > limit
+    return {
+        "items": page[:limit],
+        "count": min(len(page), limit),
+        "next_cursor": encode_cursor(offset + limit) if has_more else None,
+    }
+
+
+async def filter_employee_ids(employee_id: Optional[int], department_id: Optional[int]):
+    """Resolve employee/department filters to a set of employee ids, or None for no filter."""
+    if department_id is None:
+        return None if employee_id is None else {employee_id}
+    employees = await get_cached_list("employees", "/employees/", "Get employees failed")
+    employee_ids = {employee.get("id") for employee in employees if employee.get("department_id") == department_id}
+    if employee_id is not None:
+        employee_ids &= {employee_id}
+    return employee_ids
+
+
+@mcp.tool()
+async def okr_login(
+    email: str,
+    password: str,
+):
+    """_summary_
+    User login to the OKR system.
+    This function allows a user to log in to the OKR system using their email and password.
+    It returns a token and user metadata  that includes user_id role_id which can be used for subsequent requests to the system.
+    The token is cached for this email and automatically sent with every later call from the same session,
+    and an unexpired cached token is returned without contacting the OKR server again.
+    Args:
+        email (str): Email address of the user
+        password (str): Password of the user
+        
+    """
+    data = token_cache.lookup(email, password)
+    if data is None:
+        data = await login(email, password)
+    session = current_session()
+    if session is not None:
+        _session_identities[session] = email
+    return data
+
+@mcp.tool()
+async def create_employee(
+    name: str,
+    email: str,
+    password: str,
+    role_id: int,
+    department_id: int,
+    joined_date: str,
+):
+    """_summary_
+    Create a new employee in the OKR system.
+    This function allows an admin to create a new employee in the OKR system.
+    It requires the employee's name, email, password, role_id, department_id, and joined_date.
+    It returns the created employee's metadata.
+
+    Args:
+        name (str): name of the employee
+        email (str): _email of the employee
+        password (str): _password of the employee
+        role_id (int): _role_id of the employee
+        department_id (int): _department_id of the employee
+        joined_date (str): _joined_date of the employee
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/employees/",
+        json={
+            "name": name,
+            "email": email,
+            "password": password,
+            "role_id": role_id,
+            "department_id": department_id,
+            "joined_date": joined_date
+        }
+    )
+    if response.status_code == 201:
+        reference_data_changed("employees")
+        return response.json()
+    else:
+        raise Exception(f"Create employee failed: {response.text}")
+
+@mcp.tool()
+async def create_employees_batch(
+    employees: List[Dict[str, Any]],
+):
+    """_summary_
+    Create many employees in the OKR system in one call.
+    This function allows an admin to onboard a whole team at once.
+    Each item takes the same fields as create_employee: name, email, password, role_id, department_id and joined_date.
+    The employees are created concurrently and a failure on one item does not stop the others.
+    It returns the number of succeeded and failed items and a per-item result or error.
+
+    Args:
+        employees (List[Dict[str, Any]]): _list of employees to create
+    """
+    return await run_batch(create_employee, employees)
+
+@mcp.tool()
+async def get_specific_employee_details(
+    employee_id: int,
+    fields: Optional[List[str]] = None,
+):
+    """_summary_
+    Get specific employee details.
+    This function allows an admin to get specific employee details using their employee_id.
+    It returns the employee's metadata.
+
+    Args:
+        employee_id (int): _employee_id of the employee
+        fields (List[str], optional): _only return these keys of each record
+    """
+    if reference_mirror.ready("employees"):
+        found = reference_mirror.tables["employees"].find(id=employee_id)
+        if found:
+            return project_fields(found[0], fields)
+    return project_fields(await get_json(f"/employees/{employee_id}", "Get employee details failed"), fields)
+@mcp.tool()
+async def update_employee(
+    employee_id: int,
+    password: str,
+    name: str
+):
+    """_summary_
+    Update employee details.
+    This function allows an admin to update employee details using their employee_id.
+    It requires the employee's name, email, password, role_id, department_id, and joined_date.
+    It returns the updated employee's metadata.
+
+    Args:
+        employee_id (int): _employee_id of the employee
+        name (str): _name of the employee
+        password (str): _password of the employee
+    """
+    client = get_http_client()
+    response = await client.put(
+        f"{OKR_SERVER_URL}/employees/{employee_id}",
+        json={
+            "name": name,
+            "password": password
+        }
+    )
+    if response.status_code == 200:
+        reference_data_changed("employees")
+        return response.json()
+    else:
+        raise Exception(f"Update employee failed: {response.text}")
+
 @mcp.tool()
-async def okr_login(
-    email: str,
-    password: str,
+async def delete_employee(
+    employee_id: int,
 ):
     """_summary_
-    User login to the OKR system.
-    This function allows a user to log in to the OKR system using their email and password.
-    It returns a token and user metadata  that includes user_id role_id which can be used for subsequent requests to the system.
+    Delete an employee.
+    This function allows an admin to delete an employee using their employee_id.
+    It returns a success message.
+
     Args:
-        email (str): Email address of the user
-        password (str): Password of the user
-        
+        employee_id (int): _employee_id of the employee
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/login",
-            json={
-                "email": email,
-                "password": password
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Login failed: {response.text}")
+    client = get_http_client()
+    response = await client.delete(
+        f"{OKR_SERVER_URL}/employees/{employee_id}"
+    )
+    if response.status_code == 204:
+        reference_data_changed("employees")
+        return {"message": "Employee deleted successfully"}
+    else:
+        raise Exception(f"Delete employee failed: {response.text}")
+@mcp.tool()
+async def create_department(
+    name: str,
+):
+    """_summary_
+    Create a new department in the OKR system.
+    This function allows an admin to create a new department in the OKR system.
+    It requires the department's name.
+    It returns the created department's metadata.
 
+    Args:
+        name (str): _name of the department
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/departments/",
+        json={
+            "name": name
+        }
+    )
+    if response.status_code == 201:
+        reference_data_changed("departments")
+        return response.json()
+    else:
+        raise Exception(f"Create department failed: {response.text}")
 @mcp.tool()
-async def create_employee(
+async def create_role(
     name: str,
-    email: str,
-    password: str,
-    role_id: int,
-    department_id: int,
-    joined_date: str,
 ):
     """_summary_
-    Create a new employee in the OKR system.
-    This function allows an admin to create a new employee in the OKR system.
-    It requires the employee's name, email, password, role_id, department_id, and joined_date.
-    It returns the created employee's metadata.
+    Create a new role in the OKR system.
+    This function allows an admin to create a new role in the OKR system.
+    It requires the role's name.
+    It returns the created role's metadata.
 
     Args:
-        name (str): name of the employee
-        email (str): _email of the employee
-        password (str): _password of the employee
-        role_id (int): _role_id of the employee
-        department_id (int): _department_id of the employee
-        joined_date (str): _joined_date of the employee
+        name (str): _name of the role
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/employees/",
-            json={
-                "name": name,
-                "email": email,
-                "password": password,
-                "role_id": role_id,
-                "department_id": department_id,
-                "joined_date": joined_date
-            }
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/roles/",
+        json={
+            "name": name
+        }
+    )
+    if response.status_code == 201:
+        reference_data_changed("roles")
+        return response.json()
+    else:
+        raise Exception(f"Create role failed: {response.text}")
+    
+@mcp.tool()
+async def create_objectives(
+    title: str,
+    description: str,
+    employee_id: int,
+    start_date: str,
+    end_date: str,
+):
+    """_summary_
+    Create a new objective in the OKR system.
+    This function allows an admin to create a new objective in the OKR system.
+    It requires the objective's title, description, employee_id, start_date, and end_date.
+    It returns the created objective's metadata.
+
+    Args:
+        title (str): _title of the objective
+        description (str): _description of the objective
+        employee_id (int): _employee_id of the objective
+        start_date (str): _start_date of the objective
+        end_date (str): _end_date of the objective
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/objectives/",
+        json={
+            "title": title,
+            "description": description,
+            "employee_id": employee_id,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+    )
+    if response.status_code == 201:
+        objective = response.json()
+        resource_subscriptions.changed("objectives", {"employee_id": employee_id}, objective)
+        progress_engine.written("objective", {"title": title, "employee_id": employee_id}, objective)
+        return objective
+    else:
+        raise Exception(f"Create objective failed: {response.text}")
+@mcp.tool()
+async def update_objectives(
+    objective_id: int,
+    title: str,
+    description:str,
+    employee_id: int,
+    start_date: str,
+    end_date: str,
+):
+    """_summary_
+    Update an objective in the OKR system.
+    This function allows an admin to update an objective in the OKR system.
+    It requires the objective's title, description, employee_id, start_date, and end_date.
+    args:
+        objective_id (int): _objective_id of the objective
+        title (str): _title of the objective
+        description (str): _description of the objective
+        employee_id (int): _employee_id of the objective
+        start_date (str): _start_date of the objective
+        end_date (str): _end_date of the objective
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/objectives/{objective_id}",
+        json={
+            "title": title,
+            "description": description,
+            "employee_id": employee_id,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+    )
+    if response.status_code == 200:
+        objective = response.json()
+        resource_subscriptions.changed("objectives", {"id": objective_id, "employee_id": employee_id}, objective)
+        progress_engine.written("objective", {"id": objective_id, "title": title, "employee_id": employee_id}, objective)
+        return objective
+    else:
+        raise Exception(f"Update objective failed: {response.text}")
+@mcp.tool()
+async def delete_objectives(
+    employee_id: int,
+):
+    """_summary_
+    Delete an objective in the OKR system.
+    This function allows an admin to delete an objective in the OKR system.
+    It requires the objective's employee_id.
+    It returns a success message.
+
+    Args:
+        employee_id (int): _employee_id of the objective
+    """
+    client = get_http_client()
+    response = await client.delete(
+        f"{OKR_SERVER_URL}/objectives/{employee_id}"
+    )
+    if response.status_code == 204:
+        resource_subscriptions.changed("objectives", {"id": employee_id})
+        progress_engine.written("objective_deleted", {"id": employee_id})
+        return {"message": "Objective deleted successfully"}
+    else:
+        raise Exception(f"Delete objective failed: {response.text}")
+
+@mcp.tool()
+async def create_key_result(
+    objective_id: int,
+    title: str,
+    target_value: int,
+    current_value: int,
+    progress: int,
+    
+):
+    """_summary_
+    Create a new key result in the OKR system.
+    This function allows an admin to create a new key result in the OKR system.
+    It requires the key result's objective_id, title, target_value, current_value, and progress.
+    It returns the created key result's metadata.
+
+    Args:
+        objective_id (int): _objective_id of the key result
+        title (str): _title of the key result
+        target_value (int): _target_value of the key result
+        current_value (int): _current_value of the key result
+        progress (int): _progress of the key result
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/key_results/",
+        json={
+            "objective_id": objective_id,
+            "title": title,
+            "target_value": target_value,
+            "current_value": current_value,
+            "progress": progress
+        }
+    )
+    if response.status_code == 201:
+        key_result = response.json()
+        progress_engine.written("key_result", {
+            "objective_id": objective_id,
+            "title": title,
+            "target_value": target_value,
+            "current_value": current_value,
+            "progress": progress
+        }, key_result)
+        return key_result
+    else:
+        raise Exception(f"Create key result failed: {response.text}")
+@mcp.tool()
+async def create_key_results_batch(
+    key_results: List[Dict[str, Any]],
+):
+    """_summary_
+    Create many key results in the OKR system in one call.
+    This function allows an admin to add all key results for a planning cycle at once.
+    Each item takes the same fields as create_key_result: objective_id, title, target_value, current_value and progress.
+    The key results are created concurrently and a failure on one item does not stop the others.
+    It returns the number of succeeded and failed items and a per-item result or error.
+
+    Args:
+        key_results (List[Dict[str, Any]]): _list of key results to create
+    """
+    return await run_batch(create_key_result, key_results)
+
+@mcp.tool()
+async def update_key_result(
+    key_result_id: int,
+    title: str,
+    target_value: int,
+    current_value: int,
+    progress: int,
+):
+    """_summary_
+    Update a key result in the OKR system.
+    This function allows an admin to update a key result in the OKR system.
+    It requires the key result's objective_id, title, target_value, current_value, and progress.
+    args:
+        key_result_id (int): _key_result_id of the key result
+        title (str): _title of the key result
+        target_value (int): _target_value of the key result
+        current_value (int): _current_value of the key result
+        progress (int): _progress of the key result
+    """
+    update = {
+        "title": title,
+        "target_value": target_value,
+        "current_value": current_value,
+        "progress": progress
+    }
+    if OKR_WRITE_BEHIND:
+        # repeated updates of the same key result replace each other while queued
+        acknowledgement = write_behind.enqueue(
+            "key_result", "PUT", f"/key_results/{key_result_id}", update, coalesce_key=f"key_result:{key_result_id}"
         )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create employee failed: {response.text}")
+        progress_engine.written("key_result", {"id": key_result_id, **update})
+        return acknowledgement
+    client = get_http_client()
+    response = await client.put(
+        f"{OKR_SERVER_URL}/key_results/{key_result_id}",
+        json=update
+    )
+    if response.status_code == 200:
+        key_result = response.json()
+        progress_engine.written("key_result", {"id": key_result_id, **update}, key_result)
+        return key_result
+    else:
+        raise Exception(f"Update key result failed: {response.text}")
+@mcp.tool()
+async def create_time_sheet(
+    employee_id: int,
+    work_date: str,
+    hours_worked: int,
+    discription: str
+):
+    """_summary_
+    Create a new time sheet in the OKR system.
+    This function allows an admin to create a new time sheet in the OKR system.
+    It requires the time sheet's employee_id, work_date, hours_worked, and discription.
+    args:
+        employee_id (int): _employee_id of the time sheet
+        work_date (str): _work_date of the time sheet
+        hours_worked (int): _hours_worked of the time sheet
+        discription (str): _discription of the time sheet
+    """
+    if OKR_WRITE_BEHIND:
+        return write_behind.enqueue("time_sheet", "POST", "/time_sheets/", {
+            "employee_id": employee_id,
+            "work_date": work_date,
+            "hours_worked": hours_worked,
+            "discription": discription
+        })
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/time_sheets/",
+        json={
+            "employee_id": employee_id,
+            "work_date": work_date,
+            "hours_worked": hours_worked,
+            "discription": discription
+        }
+    )
+    if response.status_code == 201:
+        time_sheet = response.json()
+        resource_subscriptions.changed("time_sheets", {"employee_id": employee_id}, time_sheet)
+        return time_sheet
+    else:
+        raise Exception(f"Create time sheet failed: {response.text}")
+@mcp.tool()
+async def create_time_sheets_batch(
+    time_sheets: List[Dict[str, Any]],
+):
+    """_summary_
+    Create many time sheets in the OKR system in one call.
+    This function allows an admin to log several days or employees at once.
+    Each item takes the same fields as create_time_sheet: employee_id, work_date, hours_worked and discription.
+    The time sheets are created concurrently and a failure on one item does not stop the others.
+    It returns the number of succeeded and failed items and a per-item result or error.
+
+    Args:
+        time_sheets (List[Dict[str, Any]]): _list of time sheets to create
+    """
+    return await run_batch(create_time_sheet, time_sheets)
 
 @mcp.tool()
-async def get_specific_employee_details(
+async def get_a_specific_user_timesheet(
     employee_id: int,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Get specific employee details.
-    This function allows an admin to get specific employee details using their employee_id.
-    It returns the employee's metadata.
+    Get a specific user's time sheet.
+    This function allows an admin to get a specific user's time sheet using their employee_id.
+    It returns the user's time sheet metadata.
 
     Args:
-        employee_id (int): _employee_id of the employee
+        employee_id (int): _employee_id of the user
+        fields (List[str], optional): _only return these keys of each record
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/time_sheets/{employee_id}"
+    )
+    if response.status_code == 200:
+        return project_fields(response.json(), fields)
+    else:
+        raise Exception(f"Get time sheet failed: {response.text}")
+@mcp.tool()
+async def create_leave_type(
+    name: str,
+    max_days_per_year: int
+):
+    """_summary_
+    Create a new leave type in the OKR system.
+    This function allows an admin to create a new leave type in the OKR system.
+    It requires the leave type's name and max_days_per_year.
+    It returns the created leave type's metadata.
+
+    Args:
+        name (str): _name of the leave type
+        max_days_per_year (int): _max_days_per_year of the leave type
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/leave_types/",
+        json={
+            "name": name,
+            "max_days_per_year": max_days_per_year
+        }
+    )
+    if response.status_code == 201:
+        reference_data_changed("leave_types")
+        return response.json()
+    else:
+        raise Exception(f"Create leave type failed: {response.text}")
+@mcp.tool()
+async def create_leave(
+    employee_id: int,
+    leave_date: int,
+    leave_type_id: str,
+    reason: str
+):
+    """_summary_
+    Create a new leave in the OKR system.
+    This function allows an admin to create a new leave in the OKR system.
+    It requires the leave's employee_id, leave_date, leave_type_id, and reason.
+    It returns the created leave's metadata.
+
+    Args:
+        employee_id (int): _employee_id of the leave
+        leave_date (int): _leave_date of the leave
+        leave_type_id (str): _leave_type_id of the leave
+        reason (str): _reason of the leave
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/leaves/",
+        json={
+            "employee_id": employee_id,
+            "leave_date": leave_date,
+            "leave_type_id": leave_type_id,
+            "reason": reason
+        }
+    )
+    if response.status_code == 201:
+        leave = response.json()
+        resource_subscriptions.changed("leaves", {"employee_id": employee_id}, leave)
+        return leave
+    else:
+        raise Exception(f"Create leave failed: {response.text}")
+@mcp.tool()
+async def update_leave(
+    leave_id: int,
+    status: str,
+    approved_by: int,
+):
+    """_summary_
+    Update a leave in the OKR system.
+    This function allows an admin to update a leave in the OKR system.
+    args:
+        leave_id (int): _leave_id of the leave
+        status (str): _status of the leave
+        approved_by (int): _approved_by of the leave
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/employees/{employee_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get employee details failed: {response.text}")
+    client = get_http_client()
+    response = await client.put(
+        f"{OKR_SERVER_URL}/leaves/{leave_id}",
+        json={
+            "status": status,
+            "approved_by": approved_by
+        }
+    )
+    if response.status_code == 200:
+        leave = response.json()
+        resource_subscriptions.changed("leaves", {"id": leave_id}, leave)
+        return leave
+    else:
+        raise Exception(f"Update leave failed: {response.text}")
 @mcp.tool()
-async def update_employee(
+async def get_a_specific_user_leave(
     employee_id: int,
-    password: str,
-    name: str
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Update employee details.
-    This function allows an admin to update employee details using their employee_id.
-    It requires the employee's name, email, password, role_id, department_id, and joined_date.
-    It returns the updated employee's metadata.
+    Get a specific user's leave.
+    This function allows an admin to get a specific user's leave using their employee_id.
+    It returns the user's leave metadata.
 
     Args:
-        employee_id (int): _employee_id of the employee
-        name (str): _name of the employee
-        password (str): _password of the employee
+        employee_id (int): _employee_id of the user
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{OKR_SERVER_URL}/employees/{employee_id}",
-            json={
-                "name": name,
-                "password": password
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Update employee failed: {response.text}")
+    return project_fields(await get_json(f"/leaves/{employee_id}", "Get leave failed"), fields)
+@mcp.resource("leaves://leaveslist")
+async def get_leaves():
+    """_summary_
+    Get all leaves metadata.
+    This function allows an admin to get all leaves metadata.
+    It returns a list of leave metadata.
 
+    """
+    return await get_json_list("/leaves/", "Get leaves failed")
 @mcp.tool()
-async def delete_employee(
-    employee_id: int,
+async def create_project(
+    name: str,
+    description: str,
+    department_id: int,
+    start_date: str,
+    end_date: str,
 ):
     """_summary_
-    Delete an employee.
-    This function allows an admin to delete an employee using their employee_id.
-    It returns a success message.
+    Create a new project in the OKR system.
+    This function allows an admin to create a new project in the OKR system.
+    It requires the project's name, description, department_id, start_date, and end_date.
+    It returns the created project's metadata.
 
     Args:
-        employee_id (int): _employee_id of the employee
+        name (str): _name of the project
+        description (str): _description of the project
+        department_id (int): _department_id of the project
+        start_date (str): _start_date of the project
+        end_date (str): _end_date of the project
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{OKR_SERVER_URL}/employees/{employee_id}"
-        )
-        if response.status_code == 204:
-            return {"message": "Employee deleted successfully"}
-        else:
-            raise Exception(f"Delete employee failed: {response.text}")
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/projects/",
+        json={
+            "name": name,
+            "description": description,
+            "department_id": department_id,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+    )
+    if response.status_code == 201:
+        reference_data_changed("projects")
+        return response.json()
+    else:
+        raise Exception(f"Create project failed: {response.text}")
 @mcp.tool()
-async def create_department(
-    name: str,
+async def get_a_specific_project_details(
+    project_id: int,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Create a new department in the OKR system.
-    This function allows an admin to create a new department in the OKR system.
-    It requires the department's name.
-    It returns the created department's metadata.
+    Get a specific project's details.
+    This function allows an admin to get a specific project's details using their project_id.
+    It returns the project's metadata.
 
     Args:
-        name (str): _name of the department
+        project_id (int): _project_id of the project
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/departments/",
-            json={
-                "name": name
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create department failed: {response.text}")
+    if reference_mirror.ready("projects"):
+        found = reference_mirror.tables["projects"].find(id=project_id)
+        if found:
+            return project_fields(found[0], fields)
+    return project_fields(await get_json(f"/projects/{project_id}", "Get project details failed"), fields)
 @mcp.tool()
-async def create_role(
+async def update_project(
+    project_id: int,
     name: str,
+    description: str,
+    department_id: int,
+    start_date: str,
+    end_date: str,
+    status: str):
+    """_summary_
+    Update a project in the OKR system.
+    This function allows an admin to update a project in the OKR system.
+    It requires the project's name, description, department_id, start_date, end_date, and status.
+    args:
+        project_id (int): _project_id of the project
+        name (str): _name of the project
+        description (str): _description of the project
+        department_id (int): _department_id of the project
+        start_date (str): _start_date of the project
+        end_date (str): _end_date of the project
+        status (str): _status of the project
+    """
+    client = get_http_client()
+    response = await client.put(
+        f"{OKR_SERVER_URL}/projects/{project_id}",
+        json={
+            "name": name,
+            "description": description,
+            "department_id": department_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "status": status
+        }
+    )
+    if response.status_code == 200:
+        reference_data_changed("projects")
+        return response.json()
+    else:
+        raise Exception(f"Update project failed: {response.text}")
+@mcp.tool()
+async def delete_project(
+    project_id: int,
 ):
     """_summary_
-    Create a new role in the OKR system.
-    This function allows an admin to create a new role in the OKR system.
-    It requires the role's name.
-    It returns the created role's metadata.
+    Delete a project in the OKR system.
+    This function allows an admin to delete a project in the OKR system.
+    It requires the project's project_id.
+    It returns a success message.
 
     Args:
-        name (str): _name of the role
+        project_id (int): _project_id of the project
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/roles/",
-            json={
-                "name": name
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create role failed: {response.text}")
-        
+    client = get_http_client()
+    response = await client.delete(
+        f"{OKR_SERVER_URL}/projects/{project_id}"
+    )
+    if response.status_code == 204:
+        reference_data_changed("projects")
+        return {"message": "Project deleted successfully"}
+    else:
+        raise Exception(f"Delete project failed: {response.text}")
 @mcp.tool()
-async def create_objectives(
-    title: str,
-    description: str,
+async def create_project_allocations(
+    project_id: int,
     employee_id: int,
-    start_date: str,
-    end_date: str,
+    role_in_project: str,
 ):
     """_summary_
-    Create a new objective in the OKR system.
-    This function allows an admin to create a new objective in the OKR system.
-    It requires the objective's title, description, employee_id, start_date, and end_date.
-    It returns the created objective's metadata.
+    Create a new project allocation in the OKR system.
+    This function allows an admin to create a new project allocation in the OKR system.
+    It requires the project's project_id, employee_id, and role_in_project.
+    It returns the created project allocation's metadata.
 
     Args:
-        title (str): _title of the objective
-        description (str): _description of the objective
-        employee_id (int): _employee_id of the objective
-        start_date (str): _start_date of the objective
-        end_date (str): _end_date of the objective
+        project_id (int): _project_id of the project allocation
+        employee_id (int): _employee_id of the project allocation
+        role_in_project (str): _role_in_project of the project allocation
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/objectives/",
-            json={
-                "title": title,
-                "description": description,
-                "employee_id": employee_id,
-                "start_date": start_date,
-                "end_date": end_date
-            }
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/project_allocations/",
+        json={
+            "project_id": project_id,
+            "employee_id": employee_id,
+            "role_in_project": role_in_project
+        }
+    )
+    if response.status_code == 201:
+        allocation = response.json()
+        resource_subscriptions.changed(
+            "project_allocations", {"project_id": project_id, "employee_id": employee_id}, allocation
         )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create objective failed: {response.text}")
+        return allocation
+    else:
+        raise Exception(f"Create project allocation failed: {response.text}")
 @mcp.tool()
-async def update_objectives(
-    objective_id: int,
-    title: str,
-    description:str,
+async def update_project_allocations(
+    status: str,
+    project_id: int,
     employee_id: int,
-    start_date: str,
-    end_date: str,
 ):
     """_summary_
-    Update an objective in the OKR system.
-    This function allows an admin to update an objective in the OKR system.
-    It requires the objective's title, description, employee_id, start_date, and end_date.
+    Update a project allocation in the OKR system.
+    This function allows an admin to update a project allocation in the OKR system.
+    It requires the project's project_id, employee_id, and status.
     args:
-        objective_id (int): _objective_id of the objective
-        title (str): _title of the objective
-        description (str): _description of the objective
-        employee_id (int): _employee_id of the objective
-        start_date (str): _start_date of the objective
-        end_date (str): _end_date of the objective
+        status (str): _status of the project allocation
+        project_id (int): _project_id of the project allocation
+        employee_id (int): _employee_id of the project allocation
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/objectives/{objective_id}",
-            json={
-                "title": title,
-                "description": description,
-                "employee_id": employee_id,
-                "start_date": start_date,
-                "end_date": end_date
-            }
+    client = get_http_client()
+    response = await client.post(
+        f"{OKR_SERVER_URL}/project_allocations/{status}",
+        json={
+            "project_id": project_id,
+            "employee_id": employee_id
+        }
+    )
+    if response.status_code == 200:
+        allocation = response.json()
+        resource_subscriptions.changed(
+            "project_allocations", {"project_id": project_id, "employee_id": employee_id}, allocation
         )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Update objective failed: {response.text}")
+        return allocation
+    else:
+        raise Exception(f"Update project allocation failed: {response.text}")
 @mcp.tool()
-async def delete_objectives(
+async def list_of_all_employess_in_a_project(
+    project_id: int,
+    fields: Optional[List[str]] = None,
+):
+    """_summary_
+    Get a list of all employees in a project.
+    This function allows an admin to get a list of all employees in a project using their project_id.
+    It returns the project's employee metadata.
+
+    Args:
+        project_id (int): _project_id of the project
+        fields (List[str], optional): _only return these keys of each record
+    """
+    return project_fields(await get_json(f"/project_allocations/project/{project_id}", "Get project allocation failed"), fields)
+    
+@mcp.tool()
+async def list_all_project_of_a_employee(
     employee_id: int,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Delete an objective in the OKR system.
-    This function allows an admin to delete an objective in the OKR system.
-    It requires the objective's employee_id.
-    It returns a success message.
+    Get a list of all projects of an employee.
+    This function allows an admin to get a list of all projects of an employee using their employee_id.
+    It returns the employee's project metadata.
+
+    Args:
+        employee_id (int): _employee_id of the employee
+        fields (List[str], optional): _only return these keys of each record
+    """
+    return project_fields(await get_json(f"/project_allocations/employee/{employee_id}", "Get project allocation failed"), fields)
+@mcp.resource("projects://projectAllocationlist")
+async def get_project_allocations():
+    """_summary_
+    Get all project allocations metadata.
+    This function allows an admin to get all project allocations metadata.
+    It returns a list of project allocation metadata.
+
+    """
+    return await get_json_list("/project_allocations/", "Get project allocations failed")
+    
+@mcp.resource("projects://projectslist")
+async def get_projects():
+    """_summary_
+    Get all projects metadata.
+    This function allows an admin to get all projects metadata.
+    It returns a list of project metadata.
+
+    """
+    return await get_cached_list("projects", "/projects/", "Get projects failed")
+@mcp.resource("leaveTypes://leavetypeslist")
+async def get_leave_types():
+    """_summary_
+    Get all leave types metadata.
+    This function allows an admin to get all leave types metadata.
+    It returns a list of leave type metadata.
+
+    """
+    return await get_cached_list("leave_types", "/leave_types/", "Get leave types failed")
+
+
+@mcp.resource("timesheets://timesheetslist")
+async def get_timesheets():
+    """_summary_
+    Get all time sheets metadata.
+    This function allows an admin to get all time sheets metadata.
+    It returns a list of time sheet metadata.
+
+    """
+    return await get_json_list("/time_sheets/", "Get time sheets failed")
+
+@mcp.resource("objectives://objectiveslist")
+async def get_objectives():
+    """_summary_
+    Get all objectives metadata.
+    This function allows an admin to get all objectives metadata.
+    It returns a list of objective metadata.
+
+    """
+    return await get_json_list("/objectives/", "Get objectives failed")
+
+@mcp.resource("employees://employeeslist")
+async def get_employees():
+    """_summary_
+    Get all employees metadata.
+    This function allows an admin to get all employees metadata.
+    It returns a list of employee metadata.
+
+    """
+    return await get_cached_list("employees", "/employees/", "Get employees failed")
+
+@mcp.resource("roles://roleslist")
+async def get_roles():
+    """_summary_
+    Get all roles metadata.
+    This function allows an admin to get all roles metadata.
+    It returns a list of role metadata.
+
+    """
+    return await get_cached_list("roles", "/roles/", "Get roles failed")
+@mcp.resource("departments://departmentslist")
+async def get_departments():
+    """_summary_
+    Get all departments metadata.
+    This function allows an admin to get all departments metadata.
+    It returns a list of department metadata.
 
-    Args:
-        employee_id (int): _employee_id of the objective
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{OKR_SERVER_URL}/objectives/{employee_id}"
-        )
-        if response.status_code == 204:
-            return {"message": "Objective deleted successfully"}
-        else:
-            raise Exception(f"Delete objective failed: {response.text}")
+    return await get_cached_list("departments", "/departments/", "Get departments failed")
 
 @mcp.tool()
-async def create_key_result(
-    objective_id: int,
-    title: str,
-    target_value: int,
-    current_value: int,
-    progress: int,
-    
+async def list_timesheets(
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = OKR_PAGE_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Create a new key result in the OKR system.
-    This function allows an admin to create a new key result in the OKR system.
-    It requires the key result's objective_id, title, target_value, current_value, and progress.
-    It returns the created key result's metadata.
+    List time sheets one page at a time.
+    This function allows an admin to list time sheets filtered by employee, department and work_date range
+    instead of reading the whole timesheets://timesheetslist resource.
+    It returns the page's items and a next_cursor to pass back for the following page (null on the last page).
 
     Args:
-        objective_id (int): _objective_id of the key result
-        title (str): _title of the key result
-        target_value (int): _target_value of the key result
-        current_value (int): _current_value of the key result
-        progress (int): _progress of the key result
+        employee_id (int, optional): _only time sheets of this employee
+        department_id (int, optional): _only time sheets of employees in this department
+        start_date (str, optional): _earliest work_date (YYYY-MM-DD)
+        end_date (str, optional): _latest work_date (YYYY-MM-DD)
+        limit (int, optional): _maximum number of items in the page
+        cursor (str, optional): _next_cursor from the previous page
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/key_results/",
-            json={
-                "objective_id": objective_id,
-                "title": title,
-                "target_value": target_value,
-                "current_value": current_value,
-                "progress": progress
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create key result failed: {response.text}")
+    if employee_id is not None:
+        records = iter_json_list(f"/time_sheets/{employee_id}", "Get time sheet failed", method="POST")
+    else:
+        records = iter_json_list("/time_sheets/", "Get time sheets failed")
+    employee_ids = await filter_employee_ids(employee_id, department_id)
+    return await paginate(
+        records,
+        record_filter(employee_ids, "work_date", None, start_date, end_date),
+        limit,
+        cursor,
+        fields,
+    )
+
+
 @mcp.tool()
-async def update_key_result(
-    key_result_id: int,
-    title: str,
-    target_value: int,
-    current_value: int,
-    progress: int,
+async def list_leaves(
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = OKR_PAGE_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Update a key result in the OKR system.
-    This function allows an admin to update a key result in the OKR system.
-    It requires the key result's objective_id, title, target_value, current_value, and progress.
-    args:
-        key_result_id (int): _key_result_id of the key result
-        title (str): _title of the key result
-        target_value (int): _target_value of the key result
-        current_value (int): _current_value of the key result
-        progress (int): _progress of the key result
+    List leaves one page at a time.
+    This function allows an admin to list leaves filtered by employee, department, leave_date range and status
+    instead of reading the whole leaves://leaveslist resource.
+    It returns the page's items and a next_cursor to pass back for the following page (null on the last page).
+
+    Args:
+        employee_id (int, optional): _only leaves of this employee
+        department_id (int, optional): _only leaves of employees in this department
+        start_date (str, optional): _earliest leave_date (YYYY-MM-DD)
+        end_date (str, optional): _latest leave_date (YYYY-MM-DD)
+        status (str, optional): _only leaves with this status
+        limit (int, optional): _maximum number of items in the page
+        cursor (str, optional): _next_cursor from the previous page
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{OKR_SERVER_URL}/key_results/{key_result_id}",
-            json={
-                "title": title,
-                "target_value": target_value,
-                "current_value": current_value,
-                "progress": progress
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Update key result failed: {response.text}")
+    if employee_id is not None:
+        records = iter_json_list(f"/leaves/{employee_id}", "Get leave failed")
+    else:
+        records = iter_json_list("/leaves/", "Get leaves failed")
+    employee_ids = await filter_employee_ids(employee_id, department_id)
+    return await paginate(
+        records,
+        record_filter(employee_ids, "leave_date", None, start_date, end_date, status=status),
+        limit,
+        cursor,
+        fields,
+    )
+
+
 @mcp.tool()
-async def create_time_sheet(
-    employee_id: int,
-    work_date: str,
-    hours_worked: int,
-    discription: str
+async def list_objectives(
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = OKR_PAGE_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Create a new time sheet in the OKR system.
-    This function allows an admin to create a new time sheet in the OKR system.
-    It requires the time sheet's employee_id, work_date, hours_worked, and discription.
-    args:
-        employee_id (int): _employee_id of the time sheet
-        work_date (str): _work_date of the time sheet
-        hours_worked (int): _hours_worked of the time sheet
-        discription (str): _discription of the time sheet
+    List objectives one page at a time.
+    This function allows an admin to list objectives filtered by employee, department and date range
+    instead of reading the whole objectives://objectiveslist resource.
+    An objective matches the date range when its start_date..end_date period overlaps it.
+    It returns the page's items and a next_cursor to pass back for the following page (null on the last page).
+
+    Args:
+        employee_id (int, optional): _only objectives of this employee
+        department_id (int, optional): _only objectives of employees in this department
+        start_date (str, optional): _start of the date range (YYYY-MM-DD)
+        end_date (str, optional): _end of the date range (YYYY-MM-DD)
+        limit (int, optional): _maximum number of items in the page
+        cursor (str, optional): _next_cursor from the previous page
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/time_sheets/",
-            json={
-                "employee_id": employee_id,
-                "work_date": work_date,
-                "hours_worked": hours_worked,
-                "discription": discription
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create time sheet failed: {response.text}")
+    records = iter_json_list("/objectives/", "Get objectives failed")
+    employee_ids = await filter_employee_ids(employee_id, department_id)
+    return await paginate(
+        records,
+        record_filter(employee_ids, "start_date", "end_date", start_date, end_date),
+        limit,
+        cursor,
+        fields,
+    )
+
+
 @mcp.tool()
-async def get_a_specific_user_timesheet(
-    employee_id: int,
+async def list_project_allocations(
+    project_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = OKR_PAGE_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Get a specific user's time sheet.
-    This function allows an admin to get a specific user's time sheet using their employee_id.
-    It returns the user's time sheet metadata.
+    List project allocations one page at a time.
+    This function allows an admin to list project allocations filtered by project, employee, department and status
+    instead of reading the whole projects://projectAllocationlist resource.
+    It returns the page's items and a next_cursor to pass back for the following page (null on the last page).
 
     Args:
-        employee_id (int): _employee_id of the user
+        project_id (int, optional): _only allocations in this project
+        employee_id (int, optional): _only allocations of this employee
+        department_id (int, optional): _only allocations of employees in this department
+        status (str, optional): _only allocations with this status
+        limit (int, optional): _maximum number of items in the page
+        cursor (str, optional): _next_cursor from the previous page
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/time_sheets/{employee_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get time sheet failed: {response.text}")
-@mcp.tool()
-async def create_leave_type(
-    name: str,
-    max_days_per_year: int
-):
+    if project_id is not None:
+        records = iter_json_list(f"/project_allocations/project/{project_id}", "Get project allocation failed")
+    elif employee_id is not None:
+        records = iter_json_list(f"/project_allocations/employee/{employee_id}", "Get project allocation failed")
+    else:
+        records = iter_json_list("/project_allocations/", "Get project allocations failed")
+    employee_ids = await filter_employee_ids(employee_id, department_id)
+    return await paginate(
+        records,
+        record_filter(employee_ids, project_id=project_id, status=status),
+        limit,
+        cursor,
+        fields,
+    )
+
+
+@mcp.resource("timesheets://employee/{employee_id}")
+async def get_employee_timesheets(employee_id: int):
     """_summary_
-    Create a new leave type in the OKR system.
-    This function allows an admin to create a new leave type in the OKR system.
-    It requires the leave type's name and max_days_per_year.
-    It returns the created leave type's metadata.
+    Get all time sheets of one employee.
+    This function allows an admin to read a single employee's time sheets without downloading every time sheet.
+    It returns a list of time sheet metadata.
 
-    Args:
-        name (str): _name of the leave type
-        max_days_per_year (int): _max_days_per_year of the leave type
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/leave_types/",
-            json={
-                "name": name,
-                "max_days_per_year": max_days_per_year
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create leave type failed: {response.text}")
-@mcp.tool()
-async def create_leave(
-    employee_id: int,
-    leave_date: int,
-    leave_type_id: str,
-    reason: str
-):
+    return await get_a_specific_user_timesheet(employee_id)
+
+
+@mcp.resource("leaves://employee/{employee_id}")
+async def get_employee_leaves(employee_id: int):
     """_summary_
-    Create a new leave in the OKR system.
-    This function allows an admin to create a new leave in the OKR system.
-    It requires the leave's employee_id, leave_date, leave_type_id, and reason.
-    It returns the created leave's metadata.
+    Get all leaves of one employee.
+    This function allows an admin to read a single employee's leaves without downloading every leave.
+    It returns a list of leave metadata.
 
-    Args:
-        employee_id (int): _employee_id of the leave
-        leave_date (int): _leave_date of the leave
-        leave_type_id (str): _leave_type_id of the leave
-        reason (str): _reason of the leave
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/leaves/",
-            json={
-                "employee_id": employee_id,
-                "leave_date": leave_date,
-                "leave_type_id": leave_type_id,
-                "reason": reason
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create leave failed: {response.text}")
-@mcp.tool()
-async def update_leave(
-    leave_id: int,
-    status: str,
-    approved_by: int,
-):
+    return await get_json(f"/leaves/{employee_id}", "Get leave failed")
+
+
+@mcp.resource("objectives://employee/{employee_id}")
+async def get_employee_objectives(employee_id: int):
     """_summary_
-    Update a leave in the OKR system.
-    This function allows an admin to update a leave in the OKR system.
-    args:
-        leave_id (int): _leave_id of the leave
-        status (str): _status of the leave
-        approved_by (int): _approved_by of the leave
+    Get all objectives of one employee.
+    This function allows an admin to read a single employee's objectives.
+    It returns a list of objective metadata.
+
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{OKR_SERVER_URL}/leaves/{leave_id}",
-            json={
-                "status": status,
-                "approved_by": approved_by
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Update leave failed: {response.text}")
-@mcp.tool()
-async def get_a_specific_user_leave(
-    employee_id: int,
-):
+    matches = record_filter({employee_id})
+    return [record async for record in iter_json_list("/objectives/", "Get objectives failed") if matches(record)]
+
+
+@mcp.resource("projects://projectAllocationlist/{project_id}")
+async def get_project_allocations_of_project(project_id: int):
     """_summary_
-    Get a specific user's leave.
-    This function allows an admin to get a specific user's leave using their employee_id.
-    It returns the user's leave metadata.
+    Get all allocations of one project.
+    This function allows an admin to read a single project's allocations without downloading every allocation.
+    It returns a list of project allocation metadata.
 
-    Args:
-        employee_id (int): _employee_id of the user
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/leaves/{employee_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get leave failed: {response.text}")
-@mcp.resource("leaves://leaveslist")
-async def get_leaves():
+    return await get_json(f"/project_allocations/project/{project_id}", "Get project allocation failed")
+
+
+@mcp.resource("employees://employeeslist/fields/{fields}")
+async def get_employees_fields(fields: str):
     """_summary_
-    Get all leaves metadata.
-    This function allows an admin to get all leaves metadata.
-    It returns a list of leave metadata.
+    Get all employees with only the requested fields.
+    This function works like employees://employeeslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of employee metadata.
 
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/leaves/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get leaves failed: {response.text}")
-@mcp.tool()
-async def create_project(
-    name: str,
-    description: str,
-    department_id: int,
-    start_date: str,
-    end_date: str,
-):
+    return project_fields(await get_employees(), fields)
+
+
+@mcp.resource("roles://roleslist/fields/{fields}")
+async def get_roles_fields(fields: str):
     """_summary_
-    Create a new project in the OKR system.
-    This function allows an admin to create a new project in the OKR system.
-    It requires the project's name, description, department_id, start_date, and end_date.
-    It returns the created project's metadata.
+    Get all roles with only the requested fields.
+    This function works like roles://roleslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of role metadata.
 
-    Args:
-        name (str): _name of the project
-        description (str): _description of the project
-        department_id (int): _department_id of the project
-        start_date (str): _start_date of the project
-        end_date (str): _end_date of the project
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/projects/",
-            json={
-                "name": name,
-                "description": description,
-                "department_id": department_id,
-                "start_date": start_date,
-                "end_date": end_date
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create project failed: {response.text}")
-@mcp.tool()
-async def get_a_specific_project_details(
-    project_id: int,
-):
+    return project_fields(await get_roles(), fields)
+
+
+@mcp.resource("departments://departmentslist/fields/{fields}")
+async def get_departments_fields(fields: str):
     """_summary_
-    Get a specific project's details.
-    This function allows an admin to get a specific project's details using their project_id.
-    It returns the project's metadata.
+    Get all departments with only the requested fields.
+    This function works like departments://departmentslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of department metadata.
 
-    Args:
-        project_id (int): _project_id of the project
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/projects/{project_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get project details failed: {response.text}")
-@mcp.tool()
-async def update_project(
-    project_id: int,
-    name: str,
-    description: str,
-    department_id: int,
-    start_date: str,
-    end_date: str,
-    status: str):
+    return project_fields(await get_departments(), fields)
+
+
+@mcp.resource("leaveTypes://leavetypeslist/fields/{fields}")
+async def get_leave_types_fields(fields: str):
     """_summary_
-    Update a project in the OKR system.
-    This function allows an admin to update a project in the OKR system.
-    It requires the project's name, description, department_id, start_date, end_date, and status.
-    args:
-        project_id (int): _project_id of the project
-        name (str): _name of the project
-        description (str): _description of the project
-        department_id (int): _department_id of the project
-        start_date (str): _start_date of the project
-        end_date (str): _end_date of the project
-        status (str): _status of the project
+    Get all leave types with only the requested fields.
+    This function works like leaveTypes://leavetypeslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of leave type metadata.
+
+    """
+    return project_fields(await get_leave_types(), fields)
+
+
+@mcp.resource("projects://projectslist/fields/{fields}")
+async def get_projects_fields(fields: str):
+    """_summary_
+    Get all projects with only the requested fields.
+    This function works like projects://projectslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of project metadata.
+
+    """
+    return project_fields(await get_projects(), fields)
+
+
+@mcp.resource("projects://projectAllocationlist/fields/{fields}")
+async def get_project_allocations_fields(fields: str):
+    """_summary_
+    Get all project allocations with only the requested fields.
+    This function works like projects://projectAllocationlist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of project allocation metadata.
+
+    """
+    return await get_json_list("/project_allocations/", "Get project allocations failed", fields)
+
+
+@mcp.resource("leaves://leaveslist/fields/{fields}")
+async def get_leaves_fields(fields: str):
+    """_summary_
+    Get all leaves with only the requested fields.
+    This function works like leaves://leaveslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of leave metadata.
+
+    """
+    return await get_json_list("/leaves/", "Get leaves failed", fields)
+
+
+@mcp.resource("timesheets://timesheetslist/fields/{fields}")
+async def get_timesheets_fields(fields: str):
+    """_summary_
+    Get all time sheets with only the requested fields.
+    This function works like timesheets://timesheetslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of time sheet metadata.
+
+    """
+    return await get_json_list("/time_sheets/", "Get time sheets failed", fields)
+
+
+@mcp.resource("objectives://objectiveslist/fields/{fields}")
+async def get_objectives_fields(fields: str):
+    """_summary_
+    Get all objectives with only the requested fields.
+    This function works like objectives://objectiveslist but keeps only the comma-separated fields of each record, e.g. id,name.
+    It returns a list of objective metadata.
+
+    """
+    return await get_json_list("/objectives/", "Get objectives failed", fields)
+
+
+@mcp.tool()
+async def find_reference_records(
+    collection: str,
+    id: Optional[int] = None,
+    email: Optional[str] = None,
+    name: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+):
+    """_summary_
+    Look up employees, departments, roles, leave types or projects by id, email or exact name.
+    This function allows an admin to resolve names to ids (e.g. which department_id is "Sales") without reading a whole list.
+    Lookups are served from the local mirror when it is enabled, otherwise from the cached list.
+    Names and emails are matched case-insensitively. With no id, email or name it returns the whole collection.
+    It returns a list of matching records.
+
+    Args:
+        collection (str): _one of employees, departments, roles, leave_types, projects
+        id (int, optional): _id of the record
+        email (str, optional): _email of the record (employees only)
+        name (str, optional): _exact name of the record
+        fields (List[str], optional): _only return these keys of each record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{OKR_SERVER_URL}/projects/{project_id}",
-            json={
-                "name": name,
-                "description": description,
-                "department_id": department_id,
-                "start_date": start_date,
-                "end_date": end_date,
-                "status": status
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Update project failed: {response.text}")
+    if collection not in MIRROR_COLLECTIONS:
+        raise Exception(f"Unknown collection: {collection}. Use one of {', '.join(MIRROR_COLLECTIONS)}")
+    table = await reference_table(collection)
+    return project_fields(table.find(id=id, email=email, name=name), fields)
+
+
 @mcp.tool()
-async def delete_project(
-    project_id: int,
+async def search_employees(
+    query: str,
+    limit: int = 10,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Delete a project in the OKR system.
-    This function allows an admin to delete a project in the OKR system.
-    It requires the project's project_id.
-    It returns a success message.
+    Search employees by email or name, tolerating partial and misspelled input.
+    This function allows an admin to find an employee without knowing their employee_id.
+    Exact email or name matches rank first, then email/name prefixes, then similar names.
+    It returns up to limit matches, best first, each with a score between 0 and 1 and the employee record.
 
     Args:
-        project_id (int): _project_id of the project
+        query (str): _email, name or part of a name
+        limit (int, optional): _maximum number of matches
+        fields (List[str], optional): _only return these keys of each employee record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{OKR_SERVER_URL}/projects/{project_id}"
-        )
-        if response.status_code == 204:
-            return {"message": "Project deleted successfully"}
-        else:
-            raise Exception(f"Delete project failed: {response.text}")
+    table = await reference_table("employees")
+    return [
+        {"score": match["score"], "record": project_fields(match["record"], fields)}
+        for match in table.search(query, limit)
+    ]
+
+
 @mcp.tool()
-async def create_project_allocations(
-    project_id: int,
-    employee_id: int,
-    role_in_project: str,
+async def search_projects(
+    query: str,
+    limit: int = 10,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Create a new project allocation in the OKR system.
-    This function allows an admin to create a new project allocation in the OKR system.
-    It requires the project's project_id, employee_id, and role_in_project.
-    It returns the created project allocation's metadata.
+    Search projects by name, tolerating partial and misspelled input.
+    This function allows an admin to find a project without knowing its project_id.
+    Exact name matches rank first, then name prefixes, then similar names.
+    It returns up to limit matches, best first, each with a score between 0 and 1 and the project record.
 
     Args:
-        project_id (int): _project_id of the project allocation
-        employee_id (int): _employee_id of the project allocation
-        role_in_project (str): _role_in_project of the project allocation
+        query (str): _name or part of a name of the project
+        limit (int, optional): _maximum number of matches
+        fields (List[str], optional): _only return these keys of each project record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/project_allocations/",
-            json={
-                "project_id": project_id,
-                "employee_id": employee_id,
-                "role_in_project": role_in_project
-            }
-        )
-        if response.status_code == 201:
-            return response.json()
-        else:
-            raise Exception(f"Create project allocation failed: {response.text}")
+    table = await reference_table("projects")
+    return [
+        {"score": match["score"], "record": project_fields(match["record"], fields)}
+        for match in table.search(query, limit)
+    ]
+
+
 @mcp.tool()
-async def update_project_allocations(
-    status: str,
-    project_id: int,
+async def get_employee_360(
     employee_id: int,
 ):
     """_summary_
-    Update a project allocation in the OKR system.
-    This function allows an admin to update a project allocation in the OKR system.
-    It requires the project's project_id, employee_id, and status.
-    args:
-        status (str): _status of the project allocation
-        project_id (int): _project_id of the project allocation
-        employee_id (int): _employee_id of the project allocation
+    Get a complete profile of an employee in one call.
+    This function allows an admin to fetch an employee's details, project allocations, time sheets and leaves together.
+    The four lookups run concurrently; if some of them fail the others are still returned and the failures are listed in errors.
+    It returns one document with employee, projects, time_sheets, leaves and errors.
+
+    Args:
+        employee_id (int): _employee_id of the employee
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{OKR_SERVER_URL}/project_allocations/{status}",
-            json={
-                "project_id": project_id,
-                "employee_id": employee_id
-            }
-        )
-        if response.status_code == 200:
-            return response.json()
+    parts = {
+        "employee": get_specific_employee_details(employee_id),
+        "projects": list_all_project_of_a_employee(employee_id),
+        "time_sheets": get_a_specific_user_timesheet(employee_id),
+        "leaves": get_a_specific_user_leave(employee_id),
+    }
+    results = await asyncio.gather(*parts.values(), return_exceptions=True)
+    profile = {"employee_id": employee_id, "errors": {}}
+    for name, result in zip(parts, results):
+        if isinstance(result, Exception):
+            profile[name] = None
+            profile["errors"][name] = str(result)
         else:
-            raise Exception(f"Update project allocation failed: {response.text}")
+            profile[name] = result
+    return profile
+
+
+def known_employees() -> Dict[Any, Dict[str, Any]]:
+    """Employees already held locally (mirror or list cache), without any upstream call."""
+    if reference_mirror.ready("employees"):
+        return reference_mirror.tables["employees"].by_id
+    cached = response_cache.get("employees", current_identity())
+    return {employee.get("id"): employee for employee in cached or ()}
+
+
 @mcp.tool()
-async def list_of_all_employess_in_a_project(
+async def get_project_dashboard(
     project_id: int,
+    fields: Optional[List[str]] = None,
 ):
     """_summary_
-    Get a list of all employees in a project.
-    This function allows an admin to get a list of all employees in a project using their project_id.
-    It returns the project's employee metadata.
+    Get a project's staffing dashboard in one call.
+    This function allows an admin to see a project together with all its allocations and the details of every member,
+    instead of calling get_specific_employee_details once per member.
+    The project and its allocations are fetched concurrently, then member details come from cached employee data
+    where available and are otherwise fetched concurrently with a bounded number of requests in flight.
+    It returns the project, its members (each allocation with an employee record) and any per-member errors.
 
     Args:
         project_id (int): _project_id of the project
+        fields (List[str], optional): _only return these keys of each employee record
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/project_allocations/project/{project_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
+    project, allocations = await asyncio.gather(
+        get_a_specific_project_details(project_id),
+        list_of_all_employess_in_a_project(project_id),
+    )
+    member_ids = list(dict.fromkeys(allocation.get("employee_id") for allocation in allocations))
+    known = known_employees()
+    members = {member_id: known[member_id] for member_id in member_ids if member_id in known}
+    errors = {}
+    semaphore = asyncio.Semaphore(OKR_BATCH_CONCURRENCY)
+
+    async def fetch_member(member_id):
+        async with semaphore:
+            try:
+                members[member_id] = await get_specific_employee_details(member_id)
+            except Exception as e:
+                errors[str(member_id)] = str(e)
+
+    await asyncio.gather(*(fetch_member(member_id) for member_id in member_ids if member_id not in members))
+    return {
+        "project": project,
+        "members": [
+            dict(allocation, employee=project_fields(members.get(allocation.get("employee_id")), fields))
+            for allocation in allocations
+        ],
+        "member_count": len(member_ids),
+        "errors": errors,
+    }
+
+
+# Leaves in these statuses do not count against a leave balance
+UNCOUNTED_LEAVE_STATUSES = frozenset({"rejected", "cancelled", "canceled"})
+
+
+def key_result_progress(key_result: Dict[str, Any]) -> float:
+    """Progress of a key result in percent, from current_value/target_value when possible."""
+    target = key_result.get("target_value")
+    current = key_result.get("current_value")
+    if isinstance(target, (int, float)) and isinstance(current, (int, float)) and target:
+        return max(0.0, min(current / target, 1.0)) * 100
+    return float(key_result.get("progress") or 0)
+
+
+async def collect(records, matches=None):
+    """Drain an async record iterator into a list, keeping only matching records."""
+    async with aclosing(records):
+        return [record async for record in records if matches is None or matches(record)]
+
+
+class ProgressEngine:
+    """In-memory objective -> key results index with progress rollups.
+    Key result progress is derived from current_value/target_value as in
+    report_okr_progress, an objective's progress is the average of its key
+    results, and employee and department progress the average of their
+    objectives. The rollups are running sums, so a write through this server
+    adjusts one key result, one objective and one employee and department
+    total instead of rescanning. The index is rebuilt from the OKR server
+    on first use and every OKR_PROGRESS_REFRESH_INTERVAL seconds, which also
+    picks up writes made elsewhere. Like the reference mirror it is one
+    process-wide view, loaded with the background identity (the service
+    account when OKR_SERVICE_EMAIL is set, anonymous otherwise) and never with
+    a caller's own token, so every session sees that identity's data. An employee
+    write marks the employee -> department map stale, and the next read
+    reloads it and moves the affected objectives between department totals.
+    """
+
+    def __init__(self):
+        self._reset()
+        self.loaded_at = None
+        self.departments_stale = False
+        self._replay = None  # writes applied while a rebuild is fetching, replayed onto it
+
+    def _reset(self):
+        self.key_results = {}  # key result id -> record with its computed progress
+        self.objectives = {}  # objective id -> title, owner, key result ids and progress sum
+        self.by_employee = defaultdict(set)  # employee id -> objective ids
+        self.employees = {}  # employee id -> [progress sum, objectives, key results]
+        self.departments = {}  # department id -> [progress sum, objectives, key results]
+        self.department_of = {}
+
+    @staticmethod
+    def objective_progress(objective) -> float:
+        count = len(objective["key_results"])
+        return objective["sum"] / count if count else 0.0
+
+    def _objective(self, objective_id):
+        objective = self.objectives.get(objective_id)
+        if objective is None:
+            # key results can arrive before (or outlive) their objective; such stubs stay out of the rollups
+            objective = self.objectives[objective_id] = {
+                "title": None, "employee_id": None, "department_id": None,
+                "known": False, "key_results": set(), "sum": 0.0,
+            }
+        return objective
+
+    def _rollup(self, objective, sign: int):
+        if not objective["known"]:
+            return
+        progress = self.objective_progress(objective)
+        count = len(objective["key_results"])
+        for rollups, key in ((self.employees, objective["employee_id"]), (self.departments, objective["department_id"])):
+            totals = rollups.setdefault(key, [0.0, 0, 0])
+            totals[0] += sign * progress
+            totals[1] += sign
+            totals[2] += sign * count
+            if totals[1] == 0:
+                del rollups[key]
+
+    def put_objective(self, record: Dict[str, Any]):
+        if self._replay is not None:
+            self._replay.append((self.put_objective, record))
+        objective = self._objective(record["id"])
+        self._rollup(objective, -1)
+        self.by_employee[objective["employee_id"]].discard(record["id"])
+        if "title" in record:
+            objective["title"] = record["title"]
+        if "employee_id" in record:
+            objective["employee_id"] = record["employee_id"]
+            objective["department_id"] = self.department_of.get(record["employee_id"])
+        objective["known"] = True
+        self.by_employee[objective["employee_id"]].add(record["id"])
+        self._rollup(objective, 1)
+
+    def delete_objective(self, objective_id):
+        if self._replay is not None:
+            self._replay.append((self.delete_objective, objective_id))
+        objective = self.objectives.get(objective_id)
+        if objective is not None:
+            self._rollup(objective, -1)
+            self.by_employee[objective["employee_id"]].discard(objective_id)
+            objective["known"] = False
+
+    def put_key_result(self, record: Dict[str, Any]):
+        """Add or update a key result; fields missing from record keep their indexed values."""
+        if self._replay is not None:
+            self._replay.append((self.put_key_result, record))
+        current = self.key_results.get(record["id"])
+        merged = {**(current or {}), **record}
+        if merged.get("objective_id") is None:
+            self.loaded_at = None  # unknown key result without its objective: rebuild on next read
+            return
+        if current is not None:
+            objective = self.objectives[current["objective_id"]]
+            self._rollup(objective, -1)
+            objective["sum"] -= current["computed_progress"]
+            objective["key_results"].discard(record["id"])
+            self._rollup(objective, 1)
+        merged["computed_progress"] = key_result_progress(merged)
+        self.key_results[record["id"]] = merged
+        objective = self._objective(merged["objective_id"])
+        self._rollup(objective, -1)
+        objective["sum"] += merged["computed_progress"]
+        objective["key_results"].add(record["id"])
+        self._rollup(objective, 1)
+
+    def written(self, kind: str, *records):
+        """Apply a successful write: kind is objective, objective_deleted or key_result.
+        The dict records are merged in order, e.g. the tool arguments and then the upstream response.
+        """
+        record = {}
+        for part in records:
+            if isinstance(part, dict):
+                record.update(part)
+        if record.get("id") is None:
+            self.loaded_at = None  # cannot place the write without its id: rebuild on next read
+        elif kind == "objective":
+            self.put_objective(record)
+        elif kind == "objective_deleted":
+            self.delete_objective(record["id"])
         else:
-            raise Exception(f"Get project allocation failed: {response.text}")
-        
+            self.put_key_result(record)
+
+    def set_departments(self, employees):
+        """Replace the employee -> department map, re-rolling objectives of employees that moved."""
+        department_of = {employee_id: record.get("department_id") for employee_id, record in employees.items()}
+        for employee_id, objective_ids in self.by_employee.items():
+            department_id = department_of.get(employee_id)
+            if department_id == self.department_of.get(employee_id):
+                continue
+            for objective_id in objective_ids:
+                objective = self.objectives[objective_id]
+                self._rollup(objective, -1)
+                objective["department_id"] = department_id
+                self._rollup(objective, 1)
+        self.department_of = department_of
+
+    def rebuild(self, objectives, key_results, employees):
+        self._reset()
+        self.set_departments(employees)
+        for objective in objectives:
+            self.put_objective(objective)
+        for key_result in key_results:
+            self.put_key_result(key_result)
+
+    async def _load(self):
+        self.departments_stale = False
+        token = _identity_override.set(OKR_SERVICE_EMAIL or "")
+        replay = self._replay = []
+        try:
+            objectives, key_results, employees = await asyncio.gather(
+                collect(iter_json_list("/objectives/", "Get objectives failed")),
+                collect(iter_json_list("/key_results/", "Get key results failed")),
+                reference_table("employees"),
+            )
+        finally:
+            self._replay = None
+            _identity_override.reset(token)
+        self.rebuild(objectives, key_results, employees.by_id)
+        for apply, record in replay:
+            apply(record)
+        self.loaded_at = time.time()
+
+    async def _load_departments(self):
+        # cleared first so an employee write landing during the fetch marks it again
+        self.departments_stale = False
+        token = _identity_override.set(OKR_SERVICE_EMAIL or "")
+        try:
+            employees = await reference_table("employees")
+        except Exception:
+            self.departments_stale = True
+            raise
+        finally:
+            _identity_override.reset(token)
+        self.set_departments(employees.by_id)
+
+    async def ensure_loaded(self):
+        if self.loaded_at is None or time.time() - self.loaded_at > OKR_PROGRESS_REFRESH_INTERVAL:
+            await single_flight.do(("progress-engine",), self._load)
+        elif self.departments_stale:
+            await single_flight.do(("progress-engine", "departments"), self._load_departments)
+
+
+progress_engine = ProgressEngine()
+
+
 @mcp.tool()
-async def list_all_project_of_a_employee(
-    employee_id: int,
+async def report_hours(
+    group_by: str = "department",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
 ):
     """_summary_
-    Get a list of all projects of an employee.
-    This function allows an admin to get a list of all projects of an employee using their employee_id.
-    It returns the employee's project metadata.
+    Report hours logged in time sheets, totalled per group.
+    This function allows an admin to answer questions like "hours logged per department this month"
+    without reading the time sheet, employee and department lists.
+    The time sheets are joined with employees and departments and summed on the server.
+    It returns one row per group with the total hours and number of entries, largest first, and the overall total.
 
     Args:
-        employee_id (int): _employee_id of the employee
+        group_by (str, optional): _one of department, employee, month, day
+        start_date (str, optional): _earliest work_date (YYYY-MM-DD)
+        end_date (str, optional): _latest work_date (YYYY-MM-DD)
+        employee_id (int, optional): _only time sheets of this employee
+        department_id (int, optional): _only time sheets of employees in this department
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/project_allocations/employee/{employee_id}"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get project allocation failed: {response.text}"
-)
-@mcp.resource("projects://projectAllocationlist")
-async def get_project_allocations():
+    employees = dict((await reference_table("employees")).by_id)
+    departments = dict((await reference_table("departments")).by_id)
+    if group_by == "department":
+        group_of = lambda sheet: employees.get(sheet.get("employee_id"), {}).get("department_id")
+        describe = lambda key: {"department_id": key, "department": departments.get(key, {}).get("name")}
+    elif group_by == "employee":
+        group_of = lambda sheet: sheet.get("employee_id")
+        describe = lambda key: {"employee_id": key, "employee": employees.get(key, {}).get("name")}
+    elif group_by in ("month", "day"):
+        width = 7 if group_by == "month" else 10
+        group_of = lambda sheet: str(sheet.get("work_date", ""))[:width]
+        describe = lambda key: {group_by: key}
+    else:
+        raise Exception(f"Unsupported group_by: {group_by}. Use department, employee, month or day")
+    matches = record_filter(await filter_employee_ids(employee_id, department_id), "work_date", None, start_date, end_date)
+    totals = defaultdict(lambda: [0.0, 0])
+    async with aclosing(iter_json_list("/time_sheets/", "Get time sheets failed")) as records:
+        async for sheet in records:
+            if matches(sheet):
+                group = totals[group_of(sheet)]
+                group[0] += sheet.get("hours_worked") or 0
+                group[1] += 1
+    rows = [dict(describe(key), hours=hours, entries=entries) for key, (hours, entries) in totals.items()]
+    rows.sort(key=lambda row: -row["hours"])
+    return {"group_by": group_by, "total_hours": sum(row["hours"] for row in rows), "rows": rows}
+
+
+@mcp.tool()
+async def report_leave_balances(
+    year: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+):
     """_summary_
-    Get all project allocations metadata.
-    This function allows an admin to get all project allocations metadata.
-    It returns a list of project allocation metadata.
+    Report leave taken and remaining per employee and leave type for a year.
+    This function allows an admin to check leave balances against each leave type's max_days_per_year
+    without reading the leave and leave type lists. Rejected and cancelled leaves are not counted.
+    It returns one row per employee who took leave in the year (or the requested employee) with taken,
+    max_days_per_year and remaining days for every leave type.
 
+    Args:
+        year (int, optional): _calendar year, defaults to the current year
+        employee_id (int, optional): _only this employee
+        department_id (int, optional): _only employees in this department
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/project_allocations/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get project allocations failed: {response.text}")
-    
-@mcp.resource("projects://projectslist")
-async def get_projects():
+    year = str(year or time.localtime().tm_year)
+    employees = dict((await reference_table("employees")).by_id)
+    leave_types = list((await reference_table("leave_types")).by_id.values())
+    employee_ids = await filter_employee_ids(employee_id, department_id)
+    path = f"/leaves/{employee_id}" if employee_id is not None else "/leaves/"
+    taken = defaultdict(lambda: defaultdict(int))
+    async with aclosing(iter_json_list(path, "Get leaves failed")) as records:
+        async for leave in records:
+            if employee_ids is not None and leave.get("employee_id") not in employee_ids:
+                continue
+            if not str(leave.get("leave_date", "")).startswith(year):
+                continue
+            if str(leave.get("status", "")).lower() in UNCOUNTED_LEAVE_STATUSES:
+                continue
+            taken[leave.get("employee_id")][str(leave.get("leave_type_id"))] += 1
+    if employee_id is not None:
+        # report the requested employee's full allowance even when no leave was taken
+        taken.setdefault(employee_id, defaultdict(int))
+    rows = []
+    for leave_employee_id, by_type in taken.items():
+        balances = []
+        for leave_type in leave_types:
+            days = by_type.get(str(leave_type.get("id")), 0)
+            allowance = leave_type.get("max_days_per_year")
+            balances.append({
+                "leave_type_id": leave_type.get("id"),
+                "leave_type": leave_type.get("name"),
+                "taken": days,
+                "max_days_per_year": allowance,
+                "remaining": allowance - days if isinstance(allowance, (int, float)) else None,
+            })
+        rows.append({
+            "employee_id": leave_employee_id,
+            "employee": employees.get(leave_employee_id, {}).get("name"),
+            "balances": balances,
+        })
+    return {"year": int(year), "rows": rows}
+
+
+@mcp.tool()
+async def report_okr_progress(
+    group_by: str = "objective",
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+):
     """_summary_
-    Get all projects metadata.
-    This function allows an admin to get all projects metadata.
-    It returns a list of project metadata.
+    Report OKR progress rolled up from key results.
+    This function allows an admin to see how far objectives, employees or departments are
+    without reading every objective and key result.
+    Each key result's progress is current_value/target_value (capped at 100%), an objective's progress is the
+    average of its key results, and employee/department progress is the average of their objectives.
+    It returns one row per group with its progress in percent and the number of objectives and key results.
 
+    Args:
+        group_by (str, optional): _one of objective, employee, department
+        employee_id (int, optional): _only objectives of this employee
+        department_id (int, optional): _only objectives of employees in this department
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/projects/"
-        )
-        if response.status_code == 200:
-            return response.json()
+    if group_by not in ("objective", "employee", "department"):
+        raise Exception(f"Unsupported group_by: {group_by}. Use objective, employee or department")
+    employees = dict((await reference_table("employees")).by_id)
+    departments = dict((await reference_table("departments")).by_id)
+    matches = record_filter(await filter_employee_ids(employee_id, department_id))
+    objectives, key_results = await asyncio.gather(
+        collect(iter_json_list("/objectives/", "Get objectives failed"), matches),
+        collect(iter_json_list("/key_results/", "Get key results failed")),
+    )
+    kr_totals = defaultdict(lambda: [0.0, 0])
+    for key_result in key_results:
+        totals = kr_totals[key_result.get("objective_id")]
+        totals[0] += key_result_progress(key_result)
+        totals[1] += 1
+    groups = defaultdict(lambda: [0.0, 0, 0])
+    for objective in objectives:
+        progress_sum, kr_count = kr_totals.get(objective.get("id"), (0.0, 0))
+        progress = progress_sum / kr_count if kr_count else 0.0
+        if group_by == "objective":
+            key = objective.get("id")
+        elif group_by == "employee":
+            key = objective.get("employee_id")
         else:
-            raise Exception(f"Get projects failed: {response.text}")
-@mcp.resource("leaveTypes://leavetypeslist")
-async def get_leave_types():
+            key = employees.get(objective.get("employee_id"), {}).get("department_id")
+        group = groups[key]
+        group[0] += progress
+        group[1] += 1
+        group[2] += kr_count
+    titles = {objective.get("id"): objective.get("title") for objective in objectives}
+    rows = []
+    for key, (progress_sum, objective_count, kr_count) in groups.items():
+        if group_by == "objective":
+            row = {"objective_id": key, "objective": titles.get(key)}
+        elif group_by == "employee":
+            row = {"employee_id": key, "employee": employees.get(key, {}).get("name")}
+        else:
+            row = {"department_id": key, "department": departments.get(key, {}).get("name")}
+        row.update(progress=round(progress_sum / objective_count, 2), objectives=objective_count, key_results=kr_count)
+        rows.append(row)
+    return {"group_by": group_by, "rows": rows}
+
+
+@mcp.tool()
+async def get_okr_progress(
+    objective_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+):
     """_summary_
-    Get all leave types metadata.
-    This function allows an admin to get all leave types metadata.
-    It returns a list of leave type metadata.
+    Get precomputed OKR progress for an objective, an employee, a department or the whole organisation.
+    Progress is kept in memory and updated on every objective and key result write made through this server,
+    so this is much cheaper than report_okr_progress; writes made elsewhere show up after the next
+    refresh (OKR_PROGRESS_REFRESH_INTERVAL seconds). The figures are organisation-wide, read with the service
+    account (OKR_SERVICE_EMAIL) when one is configured and anonymously otherwise, not with the caller's login.
+    Key result progress is current_value/target_value (capped at 100%), an objective's progress is the average of
+    its key results, and employee/department progress is the average of their objectives.
+    For an objective it returns its key results; for an employee their objectives; for a department its employees;
+    with no argument one row per department.
 
+    Args:
+        objective_id (int, optional): _objective to get progress for
+        employee_id (int, optional): _employee to get progress for
+        department_id (int, optional): _department to get progress for
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/leave_types/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get leave types failed: {response.text}")
+    await progress_engine.ensure_loaded()
+    engine = progress_engine
 
+    def objective_row(objective_id):
+        objective = engine.objectives[objective_id]
+        return {
+            "objective_id": objective_id,
+            "objective": objective["title"],
+            "progress": round(engine.objective_progress(objective), 2),
+            "key_results": len(objective["key_results"]),
+        }
 
-@mcp.resource("timesheets://timesheetslist")
-async def get_timesheets():
+    def rollup_row(name, key, totals):
+        progress_sum, objectives, key_results = totals or (0.0, 0, 0)
+        return {
+            name: key,
+            "progress": round(progress_sum / objectives, 2) if objectives else 0.0,
+            "objectives": objectives,
+            "key_results": key_results,
+        }
+
+    if objective_id is not None:
+        objective = engine.objectives.get(objective_id)
+        if objective is None or not objective["known"]:
+            raise Exception(f"Objective {objective_id} not found")
+        row = objective_row(objective_id)
+        row["employee_id"] = objective["employee_id"]
+        row["key_results"] = [
+            {
+                "key_result_id": key_result_id,
+                "title": engine.key_results[key_result_id].get("title"),
+                "progress": round(engine.key_results[key_result_id]["computed_progress"], 2),
+            }
+            for key_result_id in sorted(objective["key_results"])
+        ]
+    elif employee_id is not None:
+        row = rollup_row("employee_id", employee_id, engine.employees.get(employee_id))
+        row["objective_progress"] = [objective_row(key) for key in sorted(engine.by_employee.get(employee_id, ()))]
+    elif department_id is not None:
+        row = rollup_row("department_id", department_id, engine.departments.get(department_id))
+        row["employees"] = [
+            rollup_row("employee_id", key, totals)
+            for key, totals in sorted(engine.employees.items(), key=lambda item: str(item[0]))
+            if engine.department_of.get(key) == department_id
+        ]
+    else:
+        row = {"departments": [
+            rollup_row("department_id", key, totals)
+            for key, totals in sorted(engine.departments.items(), key=lambda item: str(item[0]))
+        ]}
+    row["as_of"] = engine.loaded_at
+    return row
+
+
+@mcp.tool()
+async def write_behind_status():
     """_summary_
-    Get all time sheets metadata.
-    This function allows an admin to get all time sheets metadata.
-    It returns a list of time sheet metadata.
+    Get the state of the write-behind queue.
+    When write-behind is enabled (OKR_WRITE_BEHIND), create_time_sheet and update_key_result are acknowledged
+    as soon as they are queued locally and sent to the OKR server in the background.
+    This function returns the number of queued writes per kind, the age of the oldest one,
+    writes that stopped being retried after repeated failures, and sent/coalesced counters.
 
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/time_sheets/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get time sheets failed: {response.text}")
+    return write_behind.status()
 
-@mcp.resource("objectives://objectiveslist")
-async def get_objectives():
+
+@mcp.tool()
+async def flush_write_behind(
+    retry_failed: bool = False,
+):
     """_summary_
-    Get all objectives metadata.
-    This function allows an admin to get all objectives metadata.
-    It returns a list of objective metadata.
+    Send all queued write-behind writes to the OKR server now instead of waiting for the background flush.
+    It returns how many writes were sent and how many failed, followed by the queue status.
 
+    Args:
+        retry_failed (bool, optional): _also retry writes that stopped being retried after repeated failures
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/objectives/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get objectives failed: {response.text}")
+    result = await write_behind.flush(retry_failed)
+    return {**result, "status": write_behind.status()}
 
-@mcp.resource("employees://employeeslist")
-async def get_employees():
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl):
+    resource_subscriptions.subscribe(str(uri), current_session())
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl):
+    resource_subscriptions.unsubscribe(str(uri), current_session())
+
+
+def _get_capabilities(get_capabilities):
+    # the low-level server always advertises resources.subscribe=False
+    def with_subscribe(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+    return with_subscribe
+
+
+mcp._mcp_server.get_capabilities = _get_capabilities(mcp._mcp_server.get_capabilities)
+
+
+@mcp.resource("metrics://snapshot")
+async def get_metrics():
     """_summary_
-    Get all employees metadata.
-    This function allows an admin to get all employees metadata.
-    It returns a list of employee metadata.
+    Get the server's performance metrics.
+    This function returns latency percentiles (p50/p95/p99) per tool and resource, split into upstream and local time,
+    together with per-upstream-route latency, response sizes and status code counts,
+    and the current upstream concurrency limits, circuit breaker states, readiness, conditional request hit counts and write-behind queue depth.
+    The same data is exposed in Prometheus text format at /metrics.
 
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/employees/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get employees failed: {response.text}")
+    snapshot = metrics.snapshot()
+    snapshot["limits"] = upstream_limits.snapshot()
+    snapshot["circuits"] = {
+        route: {"state": breaker.state, "failures": breaker.failures}
+        for route, breaker in circuit_breakers.items()
+    }
+    snapshot["upstream_health"] = upstream_health.snapshot()
+    snapshot["conditional_requests"] = conditional_cache.snapshot()
+    if OKR_WRITE_BEHIND:
+        snapshot["write_behind"] = write_behind.status()
+    return snapshot
 
-@mcp.resource("roles://roleslist")
-async def get_roles():
-    """_summary_
-    Get all roles metadata.
-    This function allows an admin to get all roles metadata.
-    It returns a list of role metadata.
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request):
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request):
+    """Liveness: the process is up and its event loop is responding."""
+    from starlette.responses import JSONResponse
+
+    return JSONResponse({"status": "ok"})
+
+
+@mcp.custom_route("/readyz", methods=["GET"])
+async def readyz(request):
+    """Readiness: 200 once warmed up and while the upstream probe passes, 503 otherwise."""
+    from starlette.responses import JSONResponse
+
+    snapshot = upstream_health.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+class GZipStreamMiddleware:
+    """gzip for HTTP responses when the client accepts it, including SSE streams.
+    Each chunk of a streamed body is compressed with a sync flush, so every event
+    still reaches the client as soon as it is sent while sharing one compression
+    window with the events before it. Single-chunk bodies below OKR_GZIP_MIN_SIZE
+    are sent as they are.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/roles/"
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Get roles failed: {response.text}")
-@mcp.resource("departments://departmentslist")
-async def get_departments():
-    """_summary_
-    Get all departments metadata.
-    This function allows an admin to get all departments metadata.
-    It returns a list of department metadata.
 
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        from starlette.datastructures import Headers, MutableHeaders
+
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                if "content-encoding" in Headers(raw=message["headers"]) or message["status"] in (204, 206, 304):
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or (start is None and compressor is None):
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None and not more_body and len(body) < OKR_GZIP_MIN_SIZE:
+                await send(start)
+                start = None
+                await send(message)
+                return
+            if compressor is None:
+                compressor = zlib.compressobj(OKR_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+            def compress():
+                return compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+            # large bodies are compressed off the event loop
+            data = await asyncio.to_thread(compress) if len(body) > 256 * 1024 else compress()
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+                start = None
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+async def run_stdio():
+    async with app_lifespan(None):
+        await mcp.run_stdio_async()
+
+
+def create_app(gzip: bool = OKR_GZIP):
+    """Build the ASGI app for OKR_MCP_TRANSPORT with the process lifespan attached.
+    Also served by each worker process, without gzip (the router in front compresses).
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{OKR_SERVER_URL}/departments/"
-        )
-        if response.status_code == 200:
-            return response.json()
+    if os.getenv("OKR_MCP_TRANSPORT", "sse") == "streamable-http":
+        app = mcp.streamable_http_app()
+        session_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with app_lifespan(app), session_lifespan(app):
+                yield
+
+        app.router.lifespan_context = lifespan
+    else:
+        app = mcp.sse_app()
+        app.router.lifespan_context = app_lifespan
+    if gzip:
+        app.add_middleware(GZipStreamMiddleware)
+    return app
+
+
+# endpoint event that opens an SSE session, announcing the session's message URI
+_SSE_ENDPOINT = re.compile(rb"event: endpoint\r?\ndata: [^\r\n]*session_id=([0-9a-f]+)")
+# headers that belong to one connection and are not passed through the router
+_HOP_HEADERS = frozenset((b"host", b"connection", b"keep-alive", b"transfer-encoding", b"accept-encoding", b"upgrade"))
+
+
+class StickyRouter:
+    """ASGI front end for --workers N, listening on the public host and port.
+    MCP sessions live in the worker process that created them, so each request
+    is forwarded over that worker's Unix socket and every session stays on its
+    worker: SSE sessions by the session_id announced in the stream's endpoint
+    event, streamable-HTTP sessions by the mcp-session-id response header.
+    Requests outside a session (new streams, initialize, /metrics, /healthz,
+    /readyz) go round robin, so /metrics shows one worker at a time. If a
+    worker exits the whole server shuts down, since its sessions are gone.
+    """
+
+    def __init__(self, sockets: List[str], processes, sse: bool):
+        self.sockets = sockets
+        self.processes = processes
+        self.sse = sse
+        self.owners = OrderedDict()  # session id -> worker index, least recently used first
+        self.max_sessions = 100_000
+        self._clients = []
+        self._next = 0
+        self._watch = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._forward(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                deadline = time.monotonic() + 60
+                while not all(os.path.exists(path) for path in self.sockets):
+                    if time.monotonic() > deadline or not all(process.is_alive() for process in self.processes):
+                        await send({"type": "lifespan.startup.failed", "message": "Workers did not start"})
+                        return
+                    await asyncio.sleep(0.05)
+                self._clients = [
+                    httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=path), timeout=None)
+                    for path in self.sockets
+                ]
+                self._watch = asyncio.create_task(self._watch_workers())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self._watch.cancel()
+                await asyncio.gather(*(client.aclose() for client in self._clients))
+                # uvicorn re-raises the signal that stopped it once serving ends, so stop the workers here
+                await asyncio.to_thread(self.stop)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def stop(self):
+        """Terminate the workers, wait for them and remove their sockets."""
+        import shutil
+
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join()
+        shutil.rmtree(os.path.dirname(self.sockets[0]), ignore_errors=True)
+
+    async def _watch_workers(self):
+        import signal
+
+        while True:
+            await asyncio.sleep(1)
+            for process in self.processes:
+                if not process.is_alive():
+                    logger.error("Worker %s exited with code %s, shutting down", process.pid, process.exitcode)
+                    os.kill(os.getpid(), signal.SIGTERM)
+                    return
+
+    def _own(self, session_id: str, index: int):
+        self.owners[session_id] = index
+        self.owners.move_to_end(session_id)
+        while len(self.owners) > self.max_sessions:
+            self.owners.popitem(last=False)
+
+    async def _forward(self, scope, receive, send):
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse, StreamingResponse
+
+        request = Request(scope, receive)
+        session_id = request.headers.get("mcp-session-id") or request.query_params.get("session_id")
+        if session_id:
+            index = self.owners.get(session_id)
+            if index is None:
+                await JSONResponse({"error": "Unknown session"}, status_code=404)(scope, receive, send)
+                return
+            self.owners.move_to_end(session_id)
         else:
-            raise Exception(f"Get departments failed: {response.text}")
+            index = self._next % len(self._clients)
+            self._next += 1
+        target = scope.get("raw_path") or scope["path"].encode()
+        if scope["query_string"]:
+            target += b"?" + scope["query_string"]
+        upstream = self._clients[index].build_request(
+            request.method,
+            "http://worker" + target.decode("latin-1"),
+            headers=[(name, value) for name, value in request.headers.raw if name not in _HOP_HEADERS],
+            content=await request.body(),
+        )
+        try:
+            response = await self._clients[index].send(upstream, stream=True)
+        except httpx.TransportError as e:
+            await JSONResponse({"error": f"Worker unavailable: {e}"}, status_code=502)(scope, receive, send)
+            return
+        if response.headers.get("mcp-session-id"):
+            self._own(response.headers["mcp-session-id"], index)
+        if session_id and (request.method == "DELETE" or response.status_code == 404):
+            self.owners.pop(session_id, None)
+        opens_sse = self.sse and request.method == "GET" and not session_id
+        relayed = StreamingResponse(self._relay(response, index, opens_sse), status_code=response.status_code)
+        relayed.raw_headers = [
+            (name.lower(), value) for name, value in response.headers.raw if name.lower() not in _HOP_HEADERS
+        ]
+        await relayed(scope, receive, send)
+
+    async def _relay(self, response: httpx.Response, index: int, opens_sse: bool):
+        """Pass the worker's body through, learning the session id of a new SSE stream."""
+        streaming = response.headers.get("content-type", "").startswith("text/event-stream")
+        pending = b"" if opens_sse and streaming else None
+        session_id = None
+        try:
+            async for chunk in response.aiter_raw():
+                if pending is not None:
+                    pending += chunk
+                    match = _SSE_ENDPOINT.search(pending)
+                    if match is not None:
+                        # owned before the client can see the endpoint and post to it
+                        session_id = match.group(1).decode()
+                        self._own(session_id, index)
+                    if match is not None or len(pending) > 4096:
+                        pending = None
+                yield chunk
+        finally:
+            await response.aclose()
+            if session_id is not None:
+                self.owners.pop(session_id, None)
+
+
+def run_worker(path: str):
+    """One process of --workers N, serving the MCP app on a Unix socket for StickyRouter."""
+    import uvicorn
+
+    uvicorn.run(create_app(gzip=False), uds=path, log_level=mcp.settings.log_level.lower())
+
+
+def run_http(host: str, port: int, workers: int):
+    import uvicorn
+
+    mcp.settings.port = port
+    if workers <= 1:
+        uvicorn.run(
+            create_app(),
+            host=host,
+            port=port,
+            log_level=mcp.settings.log_level.lower(),
+        )
+        return
+    import multiprocessing
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix="okr-server-")
+    sockets = [os.path.join(directory, f"worker-{i}.sock") for i in range(workers)]
+    processes = [multiprocessing.Process(target=run_worker, args=(path,), daemon=True) for path in sockets]
+    for process in processes:
+        process.start()
+    router = StickyRouter(sockets, processes, sse=os.getenv("OKR_MCP_TRANSPORT", "sse") == "sse")
+    try:
+        uvicorn.run(
+            GZipStreamMiddleware(router) if OKR_GZIP else router,
+            host=host,
+            port=port,
+            log_level=mcp.settings.log_level.lower(),
+        )
+    finally:
+        router.stop()
+
+
+def startup_benchmark(host: str, port: int) -> bool:
+    """Serve until uvicorn reports startup complete, then stop and print the timings.
+    warmed_seconds is when /readyz first passed, or null if not within the budget.
+    Returns whether the server was accepting connections within OKR_STARTUP_BUDGET seconds.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(), host=host, port=port, log_level="warning"))
+
+    async def serve():
+        serving = asyncio.create_task(server.serve())
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.005)
+        ready = time.perf_counter()
+        # give the warm-up until the end of the budget to make /readyz pass
+        while not upstream_health.ready() and time.perf_counter() - IMPORT_STARTED < OKR_STARTUP_BUDGET:
+            await asyncio.sleep(0.005)
+        warmed = time.perf_counter() if upstream_health.ready() else None
+        server.should_exit = True
+        await serving
+        return ready, warmed
+
+    ready, warmed = asyncio.run(serve())
+    report = {
+        "import_seconds": round(IMPORT_FINISHED - IMPORT_STARTED, 4),
+        "ready_seconds": round(ready - IMPORT_STARTED, 4),
+        "warmed_seconds": round(warmed - IMPORT_STARTED, 4) if warmed else None,
+        "budget_seconds": OKR_STARTUP_BUDGET,
+    }
+    report["within_budget"] = report["ready_seconds"] <= OKR_STARTUP_BUDGET
+    print(json.dumps(report))
+    return report["within_budget"]
+
+
+def parse_args():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="QH OKR MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=("stdio", "sse", "streamable-http"),
+        default=os.getenv("OKR_MCP_TRANSPORT", "sse"),
+    )
+    parser.add_argument("--host", default=mcp.settings.host)
+    parser.add_argument("--port", type=int, default=mcp.settings.port)
+    parser.add_argument(
+        "--workers",
+        default=os.getenv("OKR_MCP_WORKERS", "1"),
+        help='number of worker processes, or "auto" for one per CPU core; with more than one, all of them '
+        'serve --port through a router that keeps each MCP session on the worker that owns it',
+    )
+    parser.add_argument(
+        "--startup-benchmark",
+        action="store_true",
+        help="start the HTTP server once, report import and ready-to-serve time, then exit",
+    )
+    args = parser.parse_args()
+    args.workers = os.cpu_count() or 1 if args.workers == "auto" else int(args.workers)
+    return args
+
+
+IMPORT_FINISHED = time.perf_counter()
+
 if __name__ == "__main__":
-    transport = "sse"
-    if transport == "stdio":
-        print("Starting MCP server with stdio transport...")
-        mcp.run(transport="stdio")
-    elif transport == "sse":
-        print("Starting MCP server with SSE transport...")
-        mcp.run(transport="sse")
+    args = parse_args()
+    os.environ["OKR_MCP_TRANSPORT"] = args.transport
+    if args.startup_benchmark:
+        if args.transport == "stdio":
+            os.environ["OKR_MCP_TRANSPORT"] = "sse"
+        raise SystemExit(0 if startup_benchmark(args.host, args.port) else 1)
+    elif args.transport == "stdio":
+        # stdout carries the JSON-RPC stream
+        logger.info("Starting MCP server with stdio transport...")
+        asyncio.run(run_stdio())
+    elif args.transport == "sse":
+        print(f"Starting MCP server with SSE transport on {args.host}:{args.port} ({args.workers} worker(s))...")
+        run_http(args.host, args.port, args.workers)
+    elif args.transport == "streamable-http":
+        print(f"Starting MCP server with streamable HTTP transport on {args.host}:{args.port} ({args.workers} worker(s))...")
+        run_http(args.host, args.port, args.workers)
     else:
-        raise ValueError("Unsupported transport type. Use 'stdio' or 'sse'.")
-       
\ No newline at end of file
+        raise ValueError("Unsupported transport type. Use 'stdio', 'sse' or 'streamable-http'.")
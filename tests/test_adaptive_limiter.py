@@ -0,0 +1,60 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "okr_server", os.path.join(os.path.dirname(__file__), os.pardir, "okr-server.py")
+)
+okr_server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(okr_server)
+
+
+async def _release_while_giving_up(limiter, timeout):
+    """Queue an acquire, let it start giving up, then free a slot before it finishes."""
+    await limiter.acquire(1)
+    waiting = asyncio.create_task(limiter.acquire(timeout))
+    await asyncio.sleep(0)
+    if timeout is None:
+        waiting.cancel()
+        await asyncio.sleep(0)
+    limiter.release()
+    return waiting
+
+
+def test_timeout_racing_a_release_raises_timeout():
+    async def scenario():
+        limiter = okr_server.AdaptiveLimiter(1, adaptive=False)
+        waiting = await _release_while_giving_up(limiter, 0)
+        with pytest.raises(asyncio.TimeoutError):
+            await waiting
+        assert limiter.in_flight == 0
+        assert not limiter._waiters
+
+    asyncio.run(scenario())
+
+
+def test_cancel_racing_a_release_raises_cancelled():
+    async def scenario():
+        limiter = okr_server.AdaptiveLimiter(1, adaptive=False)
+        waiting = await _release_while_giving_up(limiter, None)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.in_flight == 0
+        assert not limiter._waiters
+
+    asyncio.run(scenario())
+
+
+def test_released_slot_goes_to_the_next_waiter():
+    async def scenario():
+        limiter = okr_server.AdaptiveLimiter(1, adaptive=False)
+        await limiter.acquire(1)
+        waiting = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0)
+        limiter.release()
+        await waiting
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())